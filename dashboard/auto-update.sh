@@ -5,14 +5,28 @@
 
 cd /home/ubuntu/Lev/dashboard
 
-# Gera dashboard
-python3 generate.py > /dev/null 2>&1
+# Armazém de snapshots = worktree do branch dashboard-snapshots (fora do main)
+[ -e snapshots/.git ] || ./setup-snapshots.sh > /dev/null 2>&1
 
-# Commit e push
-cd /home/ubuntu/Lev
-git add dashboard/index.html > /dev/null 2>&1
+# Gera dashboard e guarda o snapshot (sai com código 3 quando tasks e status não mudaram)
+python3 generate.py --snapshot --profile /home/ubuntu/Lev/dashboard/.cache/profile.jsonl > /dev/null 2>&1
+rc=$?
+if [ $rc -eq 3 ]; then
+    # Nada mudou: sem commit, sem push, sem deploy
+    exit 0
+elif [ $rc -ne 0 ]; then
+    echo "[$(date '+%Y-%m-%d %H:%M:%S')] Erro ao gerar dashboard (código $rc)" >> /home/ubuntu/Lev/dashboard/auto-update.log
+    exit $rc
+fi
+
+# Commit e push no branch dashboard-snapshots (só os objetos novos do snapshot);
+# o push dispara o GitHub Actions, que reconstrói o site e faz o deploy
+cd /home/ubuntu/Lev/dashboard/snapshots
+mkdir -p .github/workflows
+cp ../../.github/workflows/deploy-pages.yml .github/workflows/
+git add -A > /dev/null 2>&1
 git commit -m "update: dashboard data $(date '+%Y-%m-%d %H:%M:%S')" > /dev/null 2>&1
-git push > /dev/null 2>&1
+git push origin dashboard-snapshots > /dev/null 2>&1
 
 # Log
 echo "[$(date '+%Y-%m-%d %H:%M:%S')] Dashboard atualizado e deployed" >> /home/ubuntu/Lev/dashboard/auto-update.log
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Facilita Factory Dashboard Benchmark
+Gera um shared/ sintético e mede cada fase do generate.py (tempo e pico de memória)
+"""
+
+import argparse
+import importlib
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_SIZES = "1000,10000,100000"
+DEFAULT_MIX = "backlog=15,spec=5,in-progress=10,review=5,blocked=5,done=60"
+DEFAULT_BASELINE = BENCH_DIR / ".cache" / "bench-baseline.json"
+
+# Regressão: mais lento que o baseline além da tolerância e de um piso absoluto
+# (fases de poucos milissegundos oscilam demais para comparar em porcentagem)
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.10
+MIN_TIME_DELTA = 0.005
+MIN_MEMORY_DELTA = 64 * 1024
+
+# Tasks guardadas na fase stream_index (como o generate.py --limit)
+STREAM_LIMIT = 200
+
+PROJECTS = ['app', 'api', 'admin', 'billing', 'mobile']
+PRIORITIES = [('critical', 5), ('high', 20), ('medium', 50), ('low', 25)]
+WORDS = ("agente task spec teste deploy api cliente fila erro cache banco tela "
+         "login pagamento relatório ajuste revisão fluxo dados página").split()
+
+def parse_mix(text):
+    """'backlog=15,done=60' → [('backlog', 15), ('done', 60)]"""
+    mix = []
+    for part in text.split(','):
+        status, _, weight = part.partition('=')
+        mix.append((status.strip(), float(weight or 1)))
+    return mix
+
+def words(rng, size):
+    text = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        text.append(word)
+        length += len(word) + 1
+    return ' '.join(text)
+
+def synthesize(root, tasks, agents=8, notes=3, description=400, mix=DEFAULT_MIX, seed=1):
+    """Cria root/shared/tasks/*.json e root/shared/status.json com dados realistas"""
+    rng = random.Random(seed)
+    tasks_dir = Path(root) / "shared" / "tasks"
+    tasks_dir.mkdir(parents=True, exist_ok=True)
+    statuses, status_weights = zip(*parse_mix(mix))
+    priorities, priority_weights = zip(*PRIORITIES)
+    agent_ids = [f"agent-{i}" for i in range(agents)]
+    now = datetime.now().astimezone()
+    in_progress = []
+
+    for i in range(tasks):
+        task_id = f"task-{i:06d}"
+        created = now - timedelta(days=rng.uniform(0, 180))
+        updated = min(now, created + timedelta(days=rng.expovariate(1 / 3)))
+        status = rng.choices(statuses, status_weights)[0]
+        task = {
+            'id': task_id,
+            'title': words(rng, rng.randint(20, 60)).capitalize(),
+            'description': words(rng, int(description * rng.uniform(0.5, 1.5))),
+            'status': status,
+            'priority': rng.choices(priorities, priority_weights)[0],
+            'assignedTo': rng.choice(agent_ids + [None]) if agent_ids else None,
+            'project': rng.choice(PROJECTS),
+            'createdAt': created.isoformat(timespec='seconds'),
+            'updatedAt': updated.isoformat(timespec='seconds'),
+            'notes': [words(rng, rng.randint(30, 120)) for _ in range(rng.randint(0, notes * 2))],
+        }
+        if rng.random() < 0.3:
+            task['specFile'] = f"specs/{task_id}.md"
+        if rng.random() < 0.2:
+            task['testScenariosFile'] = f"tests/{task_id}.md"
+        if status == 'in-progress':
+            in_progress.append(task_id)
+        (tasks_dir / f"{task_id}.json").write_text(json.dumps(task, indent=2, ensure_ascii=False))
+
+    status = {
+        'lastUpdate': now.isoformat(timespec='seconds'),
+        'tasks': {'done_today': rng.randint(0, 20)},
+        'agents': {
+            agent_id: ({'status': 'active', 'currentTask': rng.choice(in_progress)}
+                       if in_progress and rng.random() < 0.6 else {'status': 'idle'})
+            for agent_id in agent_ids
+        },
+        'alerts': [],
+    }
+    (Path(root) / "shared" / "status.json").write_text(json.dumps(status, indent=2))
+
+def clear_outputs(generate):
+    """Apaga o que o gerador escreveu, menos o manifesto das tasks"""
+    for path in generate.DASHBOARD.iterdir():
+        if path == generate.CACHE_DIR:
+            continue
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+    for path in (generate.OUTPUTS_FILE, generate.ARCHIVE_FILE, generate.FINGERPRINT_FILE,
+                 getattr(generate, 'FRAGMENTS_FILE', None)):
+        if path is not None and path.exists():
+            path.unlink()
+    history = getattr(generate, 'HISTORY_DIR', None)
+    if history is not None and history.exists():
+        shutil.rmtree(history)
+
+def phases(generate):
+    """Fases medidas, em ordem: (nome, preparo). O preparo não é medido e
+    devolve a função medida; cada fase usa o estado deixado pelas anteriores."""
+    state = {}
+
+    def load_cold():
+        if generate.MANIFEST_FILE.exists():
+            generate.MANIFEST_FILE.unlink()
+        return generate.load_tasks
+
+    def load_warm():
+        return generate.load_tasks
+
+    def build_index():
+        manifest = generate.load_manifest()
+        return lambda: state.update(index=generate.TaskIndex.from_manifest(manifest),
+                                    status=generate.load_status())
+
+    def write(snapshot=False):
+        # Como o main(): arquivo de done, cache de fragmentos e histórico quando o
+        # gerador tem (carregar cada um faz parte da medida), tudo no diretório temporário
+        options = {'archive': generate.DoneArchive()}
+        if hasattr(generate, 'FragmentCache'):
+            options['fragments'] = generate.FragmentCache()
+        if hasattr(generate, 'StatusHistory'):
+            options['history'] = generate.StatusHistory()
+            options['history'].record(state['index'], state['status'])
+        if snapshot:
+            options['snapshot'] = generate.SnapshotStore()
+        generate.write_dashboard(state['index'], state['status'], **options)
+        if snapshot:
+            options['snapshot'].commit()
+
+    def write_cold():
+        clear_outputs(generate)
+        return write
+
+    def write_warm():
+        return write
+
+    def write_snapshot():
+        # Deploy (deploy.sh/auto-update.sh): geração do zero guardando no armazém
+        clear_outputs(generate)
+        return lambda: write(snapshot=True)
+
+    def stream():
+        return lambda: generate.stream_index(STREAM_LIMIT)
+
+    # write_dashboard é o caminho real de saída: index.html, data.json, páginas por
+    # status, arquivo de done e os detalhes de cada task
+    measured = [('load_tasks (frio)', load_cold), ('load_tasks (cache)', load_warm),
+                ('TaskIndex', build_index), ('write_dashboard', write_cold),
+                ('write_dashboard (sem mudança)', write_warm), ('write_dashboard (--snapshot)', write_snapshot)]
+    # Geradores antigos (--generator da branch base) não têm o modo streaming
+    if hasattr(generate, 'stream_index'):
+        measured.append((f'stream_index (--limit {STREAM_LIMIT})', stream))
+    return measured
+
+def measure(generate, repeat):
+    """Melhor tempo de `repeat` execuções e pico de memória (tracemalloc) de cada fase"""
+    results = {}
+    for name, prepare in phases(generate):
+        best = None
+        for _ in range(repeat):
+            run = prepare()
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        # Memória numa execução separada: o tracemalloc deixa tudo bem mais lento
+        run = prepare()
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[name] = {'seconds': round(best, 6), 'peak_bytes': peak}
+    return results
+
+def compare(results, baseline, tolerance, memory_tolerance):
+    """Lista de regressões (tamanho, fase, métrica, baseline, atual)"""
+    regressions = []
+    for size, phases_ in results.items():
+        for phase, current in phases_.items():
+            base = baseline.get(size, {}).get(phase)
+            if not base:
+                continue
+            if (current['seconds'] > base['seconds'] * (1 + tolerance)
+                    and current['seconds'] - base['seconds'] > MIN_TIME_DELTA):
+                regressions.append((size, phase, 'tempo', base['seconds'], current['seconds']))
+            if (current['peak_bytes'] > base['peak_bytes'] * (1 + memory_tolerance)
+                    and current['peak_bytes'] - base['peak_bytes'] > MIN_MEMORY_DELTA):
+                regressions.append((size, phase, 'memória', base['peak_bytes'], current['peak_bytes']))
+    return regressions
+
+def delta(current, base):
+    if not base:
+        return ''
+    return f"{(current - base) / base * 100:+.0f}%"
+
+def print_results(size, results, baseline):
+    base = baseline.get(size, {})
+    print(f"\n📊 {size} tasks")
+    print(f"   {'fase':<32}{'tempo':>10}{'':>7}{'pico mem':>12}{'':>7}")
+    for phase, current in results.items():
+        previous = base.get(phase, {})
+        print(f"   {phase:<32}{current['seconds'] * 1000:>8.1f}ms"
+              f"{delta(current['seconds'], previous.get('seconds')):>7}"
+              f"{current['peak_bytes'] / 1024 / 1024:>10.1f}MB"
+              f"{delta(current['peak_bytes'], previous.get('peak_bytes')):>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do generate.py com uma factory sintética")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"quantidades de tasks, separadas por vírgula (padrão: {DEFAULT_SIZES})")
+    parser.add_argument('--agents', type=int, default=8, help="agentes no status.json (padrão: 8)")
+    parser.add_argument('--notes', type=int, default=3, help="média de notas por task (padrão: 3)")
+    parser.add_argument('--description', type=int, default=400,
+                        help="tamanho médio da descrição em caracteres (padrão: 400)")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"distribuição de status (padrão: {DEFAULT_MIX})")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3, help="execuções por fase; vale a melhor (padrão: 3)")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE,
+                        help=f"resultados de referência (padrão: {DEFAULT_BASELINE})")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="grava os resultados como novo baseline em vez de comparar")
+    parser.add_argument('--tolerance', type=float, default=TIME_TOLERANCE,
+                        help=f"piora de tempo aceita (padrão: {TIME_TOLERANCE * 100:.0f}%%)")
+    parser.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE,
+                        help=f"piora de memória aceita (padrão: {MEMORY_TOLERANCE * 100:.0f}%%)")
+    parser.add_argument('--json', type=Path, help="grava os resultados neste arquivo")
+    parser.add_argument('--generator', type=Path, default=BENCH_DIR,
+                        help="diretório do generate.py medido (ex.: checkout da branch base)")
+    parser.add_argument('--keep', type=Path, help="gera a factory sintética aqui e não apaga no final")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(args.generator.resolve()))
+    generate = importlib.import_module('generate')
+    baseline = {} if args.save_baseline else json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if not args.save_baseline and not baseline:
+        print(f"⚠️  Sem baseline em {args.baseline}; rode com --save-baseline para criar")
+
+    if args.keep:
+        args.keep.mkdir(parents=True, exist_ok=True)
+    results = {}
+    for size in [int(s) for s in args.sizes.split(',')]:
+        root = Path(tempfile.mkdtemp(prefix=f"bench-{size}-", dir=args.keep))
+        try:
+            started = time.perf_counter()
+            synthesize(root, size, args.agents, args.notes, args.description, args.mix, args.seed)
+            print(f"\n🏭 Factory sintética com {size} tasks em {root} ({time.perf_counter() - started:.1f}s)")
+            generate.set_paths(root, root / "dashboard")
+            generate.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            results[str(size)] = measure(generate, args.repeat)
+            print_results(str(size), results[str(size)], baseline)
+        finally:
+            if not args.keep:
+                shutil.rmtree(root, ignore_errors=True)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Baseline salvo em {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressão(ões) em relação ao baseline:")
+        for size, phase, metric, base, current in regressions:
+            print(f"   {size} tasks • {phase} • {metric}: {base} → {current} ({delta(current, base)})")
+        sys.exit(1)
+    if baseline:
+        print("\n✅ Sem regressões em relação ao baseline")
+
+if __name__ == '__main__':
+    main()
@@ -3,15 +3,28 @@
 
 cd /home/ubuntu/Lev/dashboard
 
+# Armazém de snapshots = worktree do branch dashboard-snapshots (fora do main)
+[ -e snapshots/.git ] || ./setup-snapshots.sh || exit 1
+
 echo "🏭 Atualizando dashboard..."
-python3 generate.py
+python3 generate.py --snapshot "$@"
+rc=$?
+if [ $rc -eq 3 ]; then
+    echo ""
+    echo "Nada para publicar (use ./deploy.sh --force para regenerar mesmo assim)"
+    exit 0
+elif [ $rc -ne 0 ]; then
+    exit $rc
+fi
 
 echo ""
-echo "📤 Fazendo commit e push..."
-cd /home/ubuntu/Lev
-git add dashboard/index.html
+echo "📤 Fazendo commit e push do snapshot (branch dashboard-snapshots)..."
+cd /home/ubuntu/Lev/dashboard/snapshots
+mkdir -p .github/workflows
+cp ../../.github/workflows/deploy-pages.yml .github/workflows/
+git add -A
 git commit -m "update: dashboard data $(date '+%Y-%m-%d %H:%M:%S')"
-git push
+git push origin dashboard-snapshots
 
 echo ""
 echo "✅ Deploy concluído!"
@@ -4,38 +4,925 @@ Facilita Factory Dashboard Generator
 Gera dashboard HTML interativo com status de tasks e agentes
 """
 
+import argparse
+import bisect
+import ctypes
+import ctypes.util
+import hashlib
+import heapq
+import inspect
 import json
 import os
+import select
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 FACTORY_ROOT = Path("/home/ubuntu/facilita-factory")
 SHARED = FACTORY_ROOT / "shared"
 DASHBOARD = Path("/home/ubuntu/Lev/dashboard")
+CACHE_DIR = DASHBOARD / ".cache"
+MANIFEST_FILE = CACHE_DIR / "tasks-manifest.json"
+MANIFEST_VERSION = 2
+FINGERPRINT_FILE = CACHE_DIR / "fingerprint"
+
+# Armazém de snapshots (generate.py --snapshot / --restore)
+SNAPSHOTS_DIR = DASHBOARD / "snapshots"
+SNAPSHOT_HASH_LEN = 32
+# Formato do manifesto: 1 = {"files": {arquivo: [nós]}} (sem "version"), 2 = lista de
+# arquivos agrupada em nós. O --restore lê os dois; manifestos antigos nunca são reescritos
+SNAPSHOT_MANIFEST_VERSION = 2
+SNAPSHOT_TREE_FANOUT = 64
+
+# Parse das tasks: paralelo a partir de PARALLEL_MIN_FILES arquivos alterados.
+# Com o page cache quente threads a mais só disputam o GIL, por isso o padrão
+# acompanha o número de CPUs; em disco frio vale subir (--threads 16).
+PARALLEL_MIN_FILES = 64
+PARSE_THREADS = min(8, os.cpu_count() or 1)
+PARSE_PROCESSES = 0
+JSON_BACKEND = 'orjson' if orjson else 'json'
+
+# Saída: o index.html mostra só as INDEX_TASK_LIMIT tasks mais recentes e
+# links para uma página por status; os detalhes de cada task ficam em
+# details/<task>.html e só são baixados quando o card é expandido
+INDEX_TASK_LIMIT = 50
+DETAILS_DIR = "details"
+STATUS_ORDER = ['backlog', 'spec', 'in-progress', 'review', 'blocked', 'done']
+OUTPUTS_FILE = CACHE_DIR / "outputs.json"
+
+# data.json: os dados das páginas, renderizados no navegador (lista virtualizada)
+# e baixados de novo a cada refresh. Cada task é uma lista na ordem de DATA_FIELDS:
+# id, título, início da descrição, status, prioridade, assignee, projeto,
+# updatedAt, arquivo de detalhes (só quando difere do id) e factory (só com várias)
+DATA_FILE = "data.json"
+DATA_FIELDS = ['i', 't', 'd', 's', 'p', 'a', 'j', 'u', 'x', 'f']
+DESCRIPTION_PREVIEW = 200
+
+# Cache de fragmentos renderizados (card e detalhes de cada task), pelo hash do
+# arquivo da task. A versão do template inclui o código das funções de render;
+# aumente CARD_TEMPLATE_VERSION se mudar algo que elas usam de fora
+FRAGMENTS_FILE = CACHE_DIR / "fragments.pack"
+FRAGMENT_CACHE_BYTES = 64 * 1024 * 1024
+CARD_TEMPLATE_VERSION = 1
+
+# Histórico do status (gráficos de throughput e utilização dos agentes): cada
+# geração acrescenta uma amostra, agregada depois por minuto e por hora. Cada
+# nível é (nome, largura do bucket em segundos, máximo de registros): ~2 dias
+# de amostras, 7 dias de minutos e 1 ano de horas, ~1,4 MB no total
+HISTORY_DIR = CACHE_DIR / "history"
+HISTORY_FIELDS = ('ts', 'samples', 'done', 'active', 'done_today', 'agents_active', 'agents_total')
+HISTORY_TIERS = (('raw', 0, 2880), ('minute', 60, 10080), ('hour', 3600, 8760))
+HISTORY_CHART_HOURS = 48
+
+# Várias factories em um dashboard só (--factory NOME=CAMINHO / --factories
+# ARQUIVO): cada uma é lida na sua thread, com manifesto próprio e cópia do
+# último status.json lido em .cache/factories/. Uma factory que dá erro ou passa
+# de FACTORY_TIMEOUT segundos entra com os dados da última leitura boa
+FACTORIES_CACHE_DIR = CACHE_DIR / "factories"
+FACTORY_TIMEOUT = 30
+
+# Tasks done: a página do status mostra só a janela recente (últimos
+# DONE_WINDOW_DAYS dias, no máximo DONE_WINDOW_TASKS; 0 desliga o limite) e as
+# mais antigas vão para páginas de arquivo com ARCHIVE_PAGE_SIZE tasks, que
+# são gravadas uma única vez quando enchem
+DONE_WINDOW_DAYS = 14
+DONE_WINDOW_TASKS = 200
+ARCHIVE_PAGE_SIZE = 200
+ARCHIVE_FILE = CACHE_DIR / "archive.json"
+
+# Código de saída quando as entradas não mudaram desde a última geração
+EXIT_UNCHANGED = 3
+
+# --profile ARQUIVO: ao passar de PROFILE_MAX_BYTES o arquivo vira ARQUIVO.1 (só uma
+# cópia antiga); com o auto-update.sh a cada 5 minutos são ~2 meses no total
+PROFILE_MAX_BYTES = 5 * 1024 * 1024
+
+class Profile:
+    """Tempo por fase e contadores de uma geração (generate.py --profile).
+
+    Fases: discover (varredura do tasks/), parse, index, render, write... O
+    tempo de render é medido fragmento a fragmento (só com `enabled`, pelo custo)
+    e descontado da fase write, que o consome em streaming.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.phases = defaultdict(float)
+        self.counters = Counter()
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name, exclude=None):
+        """Soma em `name` o tempo do bloco (menos o que foi para a fase `exclude` nele)"""
+        excluded = self.phases[exclude] if exclude else 0
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if exclude:
+                elapsed -= self.phases[exclude] - excluded
+            self.phases[name] += elapsed
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def chunks(self, name, chunks):
+        """Repassa os fragmentos somando em `name` o tempo gasto para produzi-los"""
+        return self._timed(name, chunks) if self.enabled else chunks
+
+    def _timed(self, name, chunks):
+        iterator = iter(chunks)
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.phases[name] += time.perf_counter() - started
+            yield chunk
+
+    def report(self, **extra):
+        data = {'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'total': round(time.perf_counter() - self.started, 6),
+                'phases': {name: round(value, 6) for name, value in self.phases.items()},
+                'counters': dict(self.counters)}
+        data.update(extra)
+        return data
+
+    def emit(self, destination, **extra):
+        """Imprime o relatório em JSON ('-') ou acrescenta uma linha em `destination`
+        (rotacionado em PROFILE_MAX_BYTES)"""
+        line = json.dumps(self.report(**extra), sort_keys=True)
+        if destination == '-':
+            print(line)
+            return
+        try:
+            if os.path.getsize(destination) >= PROFILE_MAX_BYTES:
+                os.replace(destination, f"{destination}.1")
+        except FileNotFoundError:
+            pass
+        with open(destination, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+PROFILE = Profile()
 
 def load_json(path):
     """Carrega JSON ou retorna {} se não existir"""
     try:
         with open(path, 'r', encoding='utf-8') as f:
             return json.load(f)
-    except:
+    except (OSError, ValueError):
         return {}
 
-def load_tasks():
-    """Carrega todas as tasks do diretório shared/tasks/"""
-    tasks = []
-    tasks_dir = SHARED / "tasks"
-    if tasks_dir.exists():
-        for file in tasks_dir.glob("task-*.json"):
-            task = load_json(file)
-            if task:
-                tasks.append(task)
-    return sorted(tasks, key=lambda x: x.get('createdAt', ''), reverse=True)
+def write_atomic(path, chunks, previous_hash=None):
+    """Grava os fragmentos direto em um arquivo temporário e renomeia no final.
+
+    O rename é atômico, então o server.py nunca serve um arquivo pela metade.
+    Os fragmentos podem ser str ou bytes. Retorna o sha1 do conteúdo; se ele
+    for igual a `previous_hash`, o arquivo existente é mantido.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    h = hashlib.sha1()
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                h.update(chunk)
+                f.write(chunk)
+        digest = h.hexdigest()
+        if digest == previous_hash:
+            os.unlink(tmp)
+            return digest
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return digest
+
+def content_hash(chunks):
+    """sha1 de fragmentos str/bytes, igual ao que write_atomic() retorna"""
+    h = hashlib.sha1()
+    for chunk in chunks:
+        h.update(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+    return h.hexdigest()
+
+def read_blocks(path, size=65536):
+    """Lê um arquivo em blocos de bytes"""
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(size), b''):
+            yield block
+
+def gzip_chunks(path):
+    """Comprime em gzip por streaming (mtime zerado no header: saída determinística)"""
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    for block in read_blocks(path):
+        yield compressor.compress(block)
+    yield compressor.flush()
+
+def brotli_chunks(path):
+    """Comprime em brotli por streaming"""
+    compressor = brotli.Compressor(quality=11)
+    for block in read_blocks(path):
+        yield compressor.process(block)
+    yield compressor.finish()
+
+def write_precompressed(path, compress=True):
+    """Grava os irmãos .gz (e .br se o brotli estiver instalado) de um arquivo gerado.
+
+    Sem compress (ou sem brotli), remove irmãos antigos para o servidor nunca
+    servir uma versão comprimida desatualizada.
+    """
+    variants = [('.gz', gzip_chunks), ('.br', brotli_chunks if brotli else None)]
+    for suffix, chunks in variants:
+        sibling = path.with_name(path.name + suffix)
+        if compress and chunks:
+            write_atomic(sibling, chunks(path))
+        else:
+            try:
+                sibling.unlink()
+            except FileNotFoundError:
+                pass
+
+def set_paths(factory_root=None, dashboard=None):
+    """Aponta o gerador para outra factory e/ou outro diretório de saída.
+
+    Recalcula os caminhos derivados (shared/, .cache/, snapshots/), como se
+    FACTORY_ROOT e DASHBOARD tivessem sido definidos assim no topo do módulo.
+    """
+    global FACTORY_ROOT, SHARED, DASHBOARD, CACHE_DIR, MANIFEST_FILE, FINGERPRINT_FILE
+    global SNAPSHOTS_DIR, OUTPUTS_FILE, ARCHIVE_FILE, FRAGMENTS_FILE, HISTORY_DIR, FACTORIES_CACHE_DIR
+    if factory_root is not None:
+        FACTORY_ROOT = Path(factory_root)
+        SHARED = FACTORY_ROOT / "shared"
+    if dashboard is not None:
+        DASHBOARD = Path(dashboard)
+        CACHE_DIR = DASHBOARD / ".cache"
+        MANIFEST_FILE = CACHE_DIR / "tasks-manifest.json"
+        FINGERPRINT_FILE = CACHE_DIR / "fingerprint"
+        SNAPSHOTS_DIR = DASHBOARD / "snapshots"
+        OUTPUTS_FILE = CACHE_DIR / "outputs.json"
+        ARCHIVE_FILE = CACHE_DIR / "archive.json"
+        FRAGMENTS_FILE = CACHE_DIR / "fragments.pack"
+        HISTORY_DIR = CACHE_DIR / "history"
+        FACTORIES_CACHE_DIR = CACHE_DIR / "factories"
+
+def set_json_backend(name):
+    """Troca o decoder JSON usado no parse das tasks ('json' ou 'orjson')"""
+    global JSON_BACKEND
+    JSON_BACKEND = name
+
+def json_loads(raw):
+    """Decodifica JSON com o backend escolhido (orjson quando instalado)"""
+    if JSON_BACKEND == 'orjson':
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def read_raw(path):
+    """Lê os bytes de um arquivo retornando (bytes, erro)"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(), None
+    except OSError as e:
+        return None, f"erro de leitura: {e.strerror or e}"
+
+def parse_task(raw):
+    """Parseia os bytes de uma task retornando (task, hash sha1, erro).
+
+    Em caso de erro a task é {} e o erro descreve o problema do arquivo.
+    """
+    digest = hashlib.sha1(raw).hexdigest()
+    try:
+        task = json_loads(raw)
+    except ValueError as e:
+        return {}, digest, f"JSON inválido: {e}"
+    if not isinstance(task, dict):
+        return {}, digest, "JSON não é um objeto"
+    return task, digest, None
+
+def read_task_file(path):
+    """Lê e parseia uma task retornando (task, hash sha1, erro)"""
+    raw, error = read_raw(path)
+    if raw is None:
+        return {}, None, error
+    return parse_task(raw)
+
+def parse_task_files(paths, threads=PARSE_THREADS, processes=PARSE_PROCESSES):
+    """Lê e parseia vários arquivos de task, em paralelo quando compensa.
+
+    Threads fazem a leitura (I/O); com `processes` o parse vai para um pool de
+    processos. O resultado sai na mesma ordem de `paths` (determinístico).
+    """
+    if len(paths) < PARALLEL_MIN_FILES or (threads <= 1 and not processes):
+        return [read_task_file(path) for path in paths]
+    if not processes:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            return list(pool.map(read_task_file, paths))
+    with ThreadPoolExecutor(max_workers=max(threads, 1)) as pool:
+        raws = list(pool.map(read_raw, paths))
+    results = [None] * len(paths)
+    pending = []
+    for i, (raw, error) in enumerate(raws):
+        if raw is None:
+            results[i] = ({}, None, error)
+        else:
+            pending.append(i)
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        chunksize = max(1, len(pending) // (processes * 4))
+        parsed = pool.map(parse_task, (raws[i][0] for i in pending), chunksize=chunksize)
+        for i, result in zip(pending, parsed):
+            results[i] = result
+    return results
+
+def load_manifest(path=None):
+    """Carrega o manifesto de tasks (arquivo → mtime, tamanho, hash, task parseada)"""
+    data = load_json(path or MANIFEST_FILE)
+    if data.get('version') != MANIFEST_VERSION:
+        return {}
+    return data.get('files', {})
+
+def save_manifest(manifest, path=None):
+    """Salva o manifesto de forma atômica (temp + rename)"""
+    data = {'version': MANIFEST_VERSION, 'files': manifest}
+    write_atomic(path or MANIFEST_FILE,
+                 [json.dumps(data, ensure_ascii=False, separators=(',', ':'))])
+
+def is_task_file(name):
+    """Verifica se o nome segue o padrão task-*.json"""
+    return name.startswith('task-') and name.endswith('.json')
+
+def scan_tasks(tasks_dir, manifest, names=None, threads=PARSE_THREADS, processes=PARSE_PROCESSES):
+    """Atualiza o manifesto relendo apenas arquivos novos ou modificados.
+
+    Sem `names` varre o diretório inteiro; com `names` verifica só esses
+    arquivos (ex.: os reportados pelo inotify no modo --watch). Arquivos
+    inválidos ficam no manifesto com a chave 'error' (ver report_errors).
+    Retorna a lista de mudanças como tuplas (arquivo, task antiga, task nova);
+    task antiga é None para arquivos novos e task nova é None para removidos.
+    """
+    with PROFILE.phase('discover'):
+        stats, removed, stale = discover_tasks(tasks_dir, manifest, names)
+    PROFILE.count('files_seen', len(stats))
+    PROFILE.count('files_parsed', len(stale))
+    PROFILE.count('files_removed', len(removed))
+
+    changes = []
+    with PROFILE.phase('parse'):
+        results = parse_task_files([tasks_dir / name for name in stale], threads, processes)
+    for name, (task, digest, error) in zip(stale, results):
+        old = manifest.get(name)
+        st = stats[name]
+        entry = {'mtime': st.st_mtime_ns, 'size': st.st_size, 'hash': digest, 'task': task}
+        if error:
+            entry['error'] = error
+            PROFILE.count('parse_errors')
+        manifest[name] = entry
+        changes.append((name, old['task'] if old else None, task))
+    for name in removed:
+        changes.append((name, manifest.pop(name)['task'], None))
+    return changes
+
+def discover_tasks(tasks_dir, manifest, names=None):
+    """stat dos arquivos de task: retorna (stats, removidos, alterados)"""
+    stats = {}
+    removed = []
+    if names is None:
+        if tasks_dir.exists():
+            with os.scandir(tasks_dir) as entries:
+                for entry in entries:
+                    if not is_task_file(entry.name):
+                        continue
+                    try:
+                        stats[entry.name] = entry.stat()
+                    except OSError:
+                        continue
+        removed = [name for name in manifest if name not in stats]
+    else:
+        for name in names:
+            if not is_task_file(name):
+                continue
+            try:
+                stats[name] = os.stat(tasks_dir / name)
+            except FileNotFoundError:
+                if name in manifest:
+                    removed.append(name)
+            except OSError:
+                continue
+
+    stale = []
+    for name in sorted(stats):
+        old = manifest.get(name)
+        st = stats[name]
+        if old and old['mtime'] == st.st_mtime_ns and old['size'] == st.st_size:
+            continue
+        stale.append(name)
+    return stats, removed, stale
+
+def report_errors(manifest, names=None):
+    """Mostra um aviso por arquivo de task que falhou no parse; retorna quantos"""
+    count = 0
+    for name in sorted(manifest if names is None else names):
+        error = manifest.get(name, {}).get('error')
+        if error:
+            print(f"   ⚠️  {name}: {error}")
+            count += 1
+    return count
+
+def manifest_tasks(manifest, limit=None, since=None):
+    """Lista as tasks do manifesto, mais recentes primeiro (só as `limit` mais
+    recentes e/ou com atividade depois de `since`, se pedido; ver top_tasks)"""
+    if limit is None and since is None:
+        tasks = [entry['task'] for entry in manifest.values() if entry['task']]
+        return sorted(tasks, key=lambda x: x.get('createdAt', ''), reverse=True)
+    items = ((name, entry['task']) for name, entry in manifest.items() if entry['task'])
+    return [task for _, task in top_tasks(items, limit, since)]
+
+class TaskIndex:
+    """Índices das tasks por id, status, prioridade, assignee, projeto e factory, com contadores.
+
+    Montado uma vez por carga (from_manifest/from_tasks) e atualizado task a
+    task com apply(), sem reconstruir nada. As tasks são guardadas por chave
+    (nome do arquivo quando vêm do manifesto); os índices guardam chaves.
+    Mantém também listas ordenadas por `sort_fields` para iterar em ordem.
+    """
+
+    def __init__(self, sort_fields=('createdAt',)):
+        self.tasks = {}
+        self.hashes = {}
+        self.by_id = {}
+        self.by_status = defaultdict(set)
+        self.by_priority = defaultdict(set)
+        self.by_assignee = defaultdict(set)
+        self.by_project = defaultdict(set)
+        self.by_factory = defaultdict(set)
+        self.status_counts = Counter()
+        self.sorted = {field: [] for field in sort_fields}
+
+    @classmethod
+    def from_manifest(cls, manifest, sort_fields=('createdAt',)):
+        index = cls(sort_fields)
+        for name, entry in manifest.items():
+            if entry['task']:
+                index.add(name, entry['task'], entry.get('hash'))
+        return index
+
+    @classmethod
+    def from_tasks(cls, tasks, sort_fields=('createdAt',)):
+        index = cls(sort_fields)
+        for position, task in enumerate(tasks):
+            index.add(task.get('id') or f"#{position}", task)
+        return index
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def add(self, key, task, digest=None):
+        """Indexa a task; `digest` é o hash do arquivo (chave do FragmentCache)"""
+        if key in self.tasks:
+            self.remove(key)
+        self.tasks[key] = task
+        if digest:
+            self.hashes[key] = digest
+        task_id = task.get('id')
+        if task_id is not None:
+            self.by_id[task_id] = key
+        self.by_status[task.get('status')].add(key)
+        self.by_priority[task.get('priority')].add(key)
+        self.by_assignee[task.get('assignedTo')].add(key)
+        self.by_project[task.get('project')].add(key)
+        self.by_factory[task.get('factory')].add(key)
+        self.status_counts[task.get('status')] += 1
+        for field, ordered in self.sorted.items():
+            bisect.insort(ordered, (sort_value(task, field), key))
+
+    def remove(self, key):
+        task = self.tasks.pop(key, None)
+        if task is None:
+            return
+        self.hashes.pop(key, None)
+        task_id = task.get('id')
+        if self.by_id.get(task_id) == key:
+            del self.by_id[task_id]
+        for index, value in ((self.by_status, task.get('status')),
+                             (self.by_priority, task.get('priority')),
+                             (self.by_assignee, task.get('assignedTo')),
+                             (self.by_project, task.get('project')),
+                             (self.by_factory, task.get('factory'))):
+            index[value].discard(key)
+            if not index[value]:
+                del index[value]
+        self.status_counts[task.get('status')] -= 1
+        if not self.status_counts[task.get('status')]:
+            del self.status_counts[task.get('status')]
+        for field, ordered in self.sorted.items():
+            item = (sort_value(task, field), key)
+            position = bisect.bisect_left(ordered, item)
+            if position < len(ordered) and ordered[position] == item:
+                del ordered[position]
+
+    def apply(self, changes, manifest=None):
+        """Aplica as mudanças retornadas por scan_tasks() (com o manifesto, guarda os hashes)"""
+        for name, _old, new in changes:
+            if new:
+                self.add(name, new, (manifest or {}).get(name, {}).get('hash'))
+            else:
+                self.remove(name)
+
+    def get(self, task_id, factory=None):
+        """Task pelo id (None se não existir); com `factory`, só dessa factory
+        (o mesmo id pode existir em outra)"""
+        key = self.by_id.get(task_id)
+        if factory is not None and (key is None or self.tasks[key].get('factory') != factory):
+            key = next((k for k in self.by_factory.get(factory, ()) if self.tasks[k].get('id') == task_id), None)
+        return self.tasks.get(key) if key is not None else None
+
+    def count(self, status):
+        """Quantas tasks têm o status"""
+        return self.status_counts.get(status, 0)
+
+    @property
+    def active_count(self):
+        return len(self) - self.count('done')
+
+    def ordered(self, field='createdAt', reverse=True):
+        """Tasks ordenadas por `field` (mais recentes primeiro por padrão)"""
+        return [self.tasks[key] for key in self.ordered_keys(field, reverse)]
+
+    def ordered_keys(self, field='createdAt', reverse=True, keys=None, limit=None, skip=None):
+        """Chaves ordenadas por `field`, opcionalmente só as de `keys` (menos as de `skip`) e até `limit`"""
+        items = reversed(self.sorted[field]) if reverse else self.sorted[field]
+        result = []
+        for _, key in items:
+            if (keys is None or key in keys) and (skip is None or key not in skip):
+                result.append(key)
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+class SampledIndex(TaskIndex):
+    """TaskIndex com só parte das tasks (ver stream_index), mas com o total e a
+    contagem por status de todas: estatísticas e links por status continuam
+    certos e a memória fica proporcional ao que é renderizado."""
+
+    def __init__(self, total, counts, sort_fields=('createdAt',)):
+        super().__init__(sort_fields)
+        self.total = total
+        self.counts = counts
+
+    def __len__(self):
+        return self.total
+
+    def count(self, status):
+        return self.counts.get(status, 0)
+
+def sort_value(task, field):
+    return str(task.get(field) or '')
+
+class TopTasks:
+    """As `limit` tasks com maior `field` vistas até agora.
+
+    Heap de tamanho fixo: O(log limit) por task e memória proporcional a
+    `limit`, não ao total. Sem `limit` guarda todas.
+    """
+
+    def __init__(self, limit=None, field='createdAt'):
+        self.limit = limit
+        self.field = field
+        self.heap = []
+
+    def push(self, key, task):
+        item = (sort_value(task, self.field), key, task)
+        if self.limit is None or len(self.heap) < self.limit:
+            heapq.heappush(self.heap, item)
+        elif item[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, item)
+
+    def items(self):
+        """[(chave, task)], maior `field` primeiro"""
+        return [(key, task) for _, key, task in sorted(self.heap, key=lambda item: item[:2], reverse=True)]
+
+def top_tasks(items, limit=None, since=None, field='createdAt'):
+    """As `limit` tasks mais recentes de um iterável de (chave, task), sem
+    materializar o iterável; com `since` (epoch), só as com atividade depois dele"""
+    top = TopTasks(limit, field)
+    for key, task in items:
+        if since is None or task_timestamp(task) >= since:
+            top.push(key, task)
+    return top.items()
+
+def iter_task_files(tasks_dir=None):
+    """Gera (arquivo, task, hash, erro) de cada task, lendo um arquivo de cada vez.
+
+    Sem manifesto: nada fica em memória além do nome dos arquivos, então dá
+    para percorrer todo o histórico em uma máquina pequena (à custa de reler
+    tudo). Os arquivos saem em ordem de nome.
+    """
+    tasks_dir = Path(tasks_dir or SHARED / "tasks")
+    try:
+        names = sorted(name for name in os.listdir(tasks_dir) if is_task_file(name))
+    except FileNotFoundError:
+        return
+    for name in names:
+        task, digest, error = read_task_file(tasks_dir / name)
+        yield name, task, digest, error
+
+def iter_tasks(tasks_dir=None):
+    """Gera as tasks válidas de shared/tasks/, uma de cada vez"""
+    for _name, task, _digest, _error in iter_task_files(tasks_dir):
+        if task:
+            yield task
+
+def stream_index(limit=None, since=None, tasks_dir=None, fingerprint=None):
+    """Monta um SampledIndex em uma passada pelos arquivos de task.
+
+    Guarda só as `limit` tasks mais recentes (por createdAt) e as `limit` mais
+    recentes de cada status, para as páginas por status; com `since` (epoch),
+    só tasks com atividade depois dele entram na seleção. O total e a contagem
+    por status contam todas as tasks válidas. Se `fingerprint` (um hashlib)
+    for passado, recebe "arquivo:hash" de cada task, como inputs_fingerprint().
+    """
+    total = 0
+    counts = Counter()
+    recent = TopTasks(limit)
+    by_status = {}
+    seen = errors = 0
+    with PROFILE.phase('parse'):
+        for name, task, digest, error in iter_task_files(tasks_dir):
+            seen += 1
+            if fingerprint is not None:
+                fingerprint.update(f"{name}:{digest}\n".encode())
+            if error:
+                print(f"   ⚠️  {name}: {error}")
+                errors += 1
+                continue
+            if not task:
+                continue
+            total += 1
+            counts[task.get('status')] += 1
+            if since is not None and task_timestamp(task) < since:
+                continue
+            recent.push(name, task)
+            top = by_status.get(task.get('status'))
+            if top is None:
+                top = by_status[task.get('status')] = TopTasks(limit)
+            top.push(name, task)
+    PROFILE.count('files_seen', seen)
+    PROFILE.count('files_parsed', seen)
+    PROFILE.count('parse_errors', errors)
+
+    with PROFILE.phase('index'):
+        index = SampledIndex(total, counts)
+        for top in [recent, *by_status.values()]:
+            for key, task in top.items():
+                if key not in index.tasks:
+                    index.add(key, task)
+    return index
+
+def load_tasks(limit=None, since=None):
+    """Carrega as tasks do diretório shared/tasks/ (incremental via manifesto),
+    mais recentes primeiro; com `limit`/`since` só as selecionadas (top_tasks)"""
+    manifest = load_manifest()
+    if scan_tasks(SHARED / "tasks", manifest):
+        save_manifest(manifest)
+    return manifest_tasks(manifest, limit, since)
+
+def fingerprint_hasher():
+    """sha256 já com a versão do gerador; depois vêm as tasks ("arquivo:hash")"""
+    h = hashlib.sha256()
+    with open(__file__, 'rb') as f:
+        h.update(hashlib.sha1(f.read()).digest())
+    return h
+
+def finish_fingerprint(h, status, options=''):
+    """Acrescenta status e opções ao hasher e retorna o fingerprint"""
+    h.update(json.dumps(status, sort_keys=True).encode())
+    h.update(options.encode())
+    return h.hexdigest()
+
+def inputs_fingerprint(manifest, status, options=''):
+    """Fingerprint das entradas (tasks + status + versão e opções do gerador).
+
+    Usa o hash de conteúdo guardado no manifesto, então não relê nenhuma task.
+    """
+    h = fingerprint_hasher()
+    for name in sorted(manifest):
+        h.update(f"{name}:{manifest[name].get('hash')}\n".encode())
+    return finish_fingerprint(h, status, options)
+
+def read_fingerprint():
+    """Fingerprint da última geração ('' se não houver)"""
+    try:
+        return FINGERPRINT_FILE.read_text().strip()
+    except OSError:
+        return ''
+
+def save_fingerprint(fingerprint):
+    write_atomic(FINGERPRINT_FILE, [fingerprint + '\n'])
 
 def load_status():
     """Carrega status.json"""
     return load_json(SHARED / "status.json")
 
+def parse_factories(specs=(), config=None):
+    """Factories do --factories ARQUIVO e dos --factory NOME=CAMINHO (repetível).
+
+    O arquivo é JSON no formato {"nome": "/caminho/da/factory", ...}; um
+    --factory com o mesmo nome substitui o do arquivo. Retorna {nome: Path} na
+    ordem em que aparecem (vazio = uma factory só, FACTORY_ROOT). Levanta
+    ValueError com a mensagem para o usuário.
+    """
+    items = []
+    if config is not None:
+        try:
+            data = json.loads(Path(config).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            raise ValueError(f"não foi possível ler {config}: {e}")
+        if not isinstance(data, dict):
+            raise ValueError(f'{config}: esperado um objeto {{"nome": "caminho"}}')
+        items.extend(data.items())
+    for spec in specs:
+        name, separator, root = spec.partition('=')
+        if not separator:
+            raise ValueError(f"--factory espera NOME=CAMINHO: {spec}")
+        items.append((name, root))
+    factories = {}
+    for name, root in items:
+        # O nome vai para chaves, nomes de arquivo e URLs
+        if not name or not all(c.isalnum() or c in '-_' for c in name):
+            raise ValueError(f"nome de factory inválido: {name!r} (use letras, números, - e _)")
+        if not isinstance(root, str) or not root:
+            raise ValueError(f"caminho inválido para a factory {name}")
+        factories[name] = Path(root).expanduser()
+    return factories
+
+class Factory:
+    """Uma factory no modo multi-factory (ver load_factories).
+
+    `manifest` e `status` são os da última leitura; quando ela falhou, `error`
+    diz o motivo e os dados são os da última leitura boa (.cache/factories/).
+    """
+
+    def __init__(self, name, root):
+        self.name = name
+        self.root = Path(root)
+        self.shared = self.root / "shared"
+        self.manifest = {}
+        self.status = {}
+        self.error = None
+
+    @property
+    def manifest_file(self):
+        return FACTORIES_CACHE_DIR / f"{self.name}-manifest.json"
+
+    @property
+    def status_file(self):
+        return FACTORIES_CACHE_DIR / f"{self.name}-status.json"
+
+    def read(self, threads=PARSE_THREADS, processes=PARSE_PROCESSES):
+        """Lê tasks (incremental, pelo manifesto da factory) e status.json; retorna (manifesto, status)"""
+        tasks_dir = self.shared / "tasks"
+        # Diretório sumido (disco desmontado) é erro, não "todas as tasks removidas"
+        if not tasks_dir.is_dir():
+            raise FileNotFoundError(f"{tasks_dir} não encontrado")
+        manifest = load_manifest(self.manifest_file)
+        if scan_tasks(tasks_dir, manifest, threads=threads, processes=processes):
+            save_manifest(manifest, self.manifest_file)
+        status = load_json(self.shared / "status.json")
+        if status and isinstance(status, dict):
+            write_atomic(self.status_file, [json.dumps(status, ensure_ascii=False, separators=(',', ':'))])
+        else:
+            # status.json sumido ou pela metade: vale a última cópia boa, que fica intacta
+            status = load_json(self.status_file)
+        return manifest, status
+
+    def read_cached(self):
+        """Dados da última leitura boa"""
+        return load_manifest(self.manifest_file), load_json(self.status_file)
+
+def load_factories(factories, threads=PARSE_THREADS, processes=PARSE_PROCESSES, timeout=FACTORY_TIMEOUT):
+    """Lê as factories em paralelo, uma thread por factory.
+
+    Uma factory que dá erro ou não termina em `timeout` segundos (disco de
+    rede travado, diretório sumido) não segura as outras: entra com os dados
+    da última leitura boa e com `error` preenchido. As threads são daemon (e
+    não um ThreadPoolExecutor, que espera as threads na saída) para que uma
+    leitura travada não impeça o processo de terminar.
+    """
+    results = {}
+
+    def read(factory):
+        try:
+            results[factory.name] = factory.read(threads, processes)
+        except Exception as e:
+            results[factory.name] = e
+
+    workers = [threading.Thread(target=read, args=(factory,), name=f"factory-{factory.name}", daemon=True)
+               for factory in factories]
+    deadline = time.monotonic() + timeout
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(max(0, deadline - time.monotonic()))
+    for factory in factories:
+        result = results.get(factory.name)
+        if isinstance(result, tuple):
+            factory.manifest, factory.status = result
+            factory.error = None
+        else:
+            factory.error = f"sem resposta em {timeout:g}s" if result is None else str(result) or type(result).__name__
+            factory.manifest, factory.status = factory.read_cached()
+    return factories
+
+def merge_status(statuses, errors=None):
+    """Junta os status.json de várias factories ({nome: status}) em um só.
+
+    Agentes ficam como "<factory>/<agente>" (com o campo 'factory'), done_today
+    é a soma, lastUpdate o mais recente e os alertas ganham o nome da factory. 'factories' resume cada uma:
+    concluídas hoje, agentes, agentes ativos, lastUpdate e o erro da última
+    leitura (`errors`, None se leu agora).
+    """
+    agents = {}
+    alerts = []
+    summary = {}
+    for name, status in statuses.items():
+        alerts.extend(f"🏭 {name}: {alert}" for alert in status.get('alerts') or [])
+        factory_agents = status.get('agents') or {}
+        for agent_id, agent in factory_agents.items():
+            agents[f"{name}/{agent_id}"] = dict(agent, factory=name)
+        done_today = status.get('tasks', {}).get('done_today') or 0
+        summary[name] = {
+            'doneToday': done_today if isinstance(done_today, (int, float)) else 0,
+            'agents': len(factory_agents),
+            'activeAgents': len([a for a in factory_agents.values() if a.get('status') == 'active']),
+            'lastUpdate': status.get('lastUpdate'),
+            'error': (errors or {}).get(name),
+        }
+    updates = [info['lastUpdate'] for info in summary.values() if isinstance(info['lastUpdate'], str)]
+    return {
+        'lastUpdate': max(updates) if updates else None,
+        'tasks': {'done_today': sum(info['doneToday'] for info in summary.values())},
+        'agents': agents,
+        'alerts': alerts,
+        'factories': summary,
+    }
+
+def merge_factories(factories):
+    """Junta as factories lidas em um manifesto e um status só.
+
+    As chaves do manifesto ficam "<factory>/<arquivo>" e cada task (uma cópia)
+    ganha o campo 'factory'; o resto do gerador trabalha com o resultado como
+    se fosse uma factory só. O resumo de cada factory em status['factories']
+    guarda o shared/ dela (caminhos nos detalhes das tasks).
+    """
+    manifest = {}
+    for factory in factories:
+        for name, entry in factory.manifest.items():
+            task = entry['task']
+            manifest[f"{factory.name}/{name}"] = dict(entry, task=dict(task, factory=factory.name) if task else task)
+    status = merge_status({factory.name: factory.status for factory in factories},
+                          {factory.name: factory.error for factory in factories})
+    for factory in factories:
+        status['factories'][factory.name]['shared'] = str(factory.shared)
+    return manifest, status
+
+def factory_stats(index, status):
+    """Linhas de estatística por factory: [nome, tasks, ativas, concluídas hoje,
+    agentes ativos, agentes, erro] (vazio com uma factory só)"""
+    done = index.by_status.get('done', set())
+    rows = []
+    for name, info in status.get('factories', {}).items():
+        keys = index.by_factory.get(name, set())
+        rows.append([name, len(keys), len(keys) - len(keys & done), info['doneToday'],
+                     info['activeAgents'], info['agents'], info['error']])
+    return rows
+
 def format_datetime(iso_str):
     """Formata ISO datetime para exibição"""
     if not iso_str:
@@ -46,439 +933,69 @@ def format_datetime(iso_str):
     except:
         return iso_str
 
+STATUS_EMOJIS = {
+    'backlog': '📋',
+    'spec': '📝',
+    'in-progress': '💻',
+    'review': '🔍',
+    'done': '✅',
+    'blocked': '🚨'
+}
+
+PRIORITY_COLORS = {
+    'critical': '#e74c3c',
+    'high': '#e67e22',
+    'medium': '#f39c12',
+    'low': '#95a5a6'
+}
+
 def get_status_emoji(status):
     """Retorna emoji para cada status"""
-    emojis = {
-        'backlog': '📋',
-        'spec': '📝',
-        'in-progress': '💻',
-        'review': '🔍',
-        'done': '✅',
-        'blocked': '🚨'
-    }
-    return emojis.get(status, '❓')
+    return STATUS_EMOJIS.get(status, '❓')
 
 def get_priority_color(priority):
     """Retorna cor CSS para cada prioridade"""
-    colors = {
-        'critical': '#e74c3c',
-        'high': '#e67e22',
-        'medium': '#f39c12',
-        'low': '#95a5a6'
-    }
-    return colors.get(priority, '#95a5a6')
+    return PRIORITY_COLORS.get(priority, '#95a5a6')
 
-def generate_html(tasks, status):
-    """Gera HTML do dashboard"""
-    
-    # Estatísticas
-    total_tasks = len(tasks)
-    active_tasks = len([t for t in tasks if t.get('status') not in ['done']])
-    done_today = status.get('tasks', {}).get('done_today', 0)
+AGENT_NAMES = {
+    'pm': 'Lev (PM)',
+    'spec': 'Spec',
+    'dev-1': 'Dev-1',
+    'dev-2': 'Dev-2',
+    'support': 'Support',
+    'qa': 'QA',
+    'docs': 'Docs'
+}
+
+def detail_name(key):
+    """Nome do arquivo de detalhes de uma task (chave do índice sem .json)"""
+    stem = key[:-5] if key.endswith('.json') else key
+    return ''.join(c if c.isalnum() or c in '-_.' else '_' for c in stem) + '.html'
+
+def render_task_card(task, details_src):
+    """Gera o HTML do card de uma task; os detalhes são carregados de `details_src` ao expandir.
+
+    O bloco de detalhes é identificado pelo nome do arquivo de detalhes (único
+    por factory), não pelo id da task, que pode se repetir entre factories.
+    """
+    task_id = task.get('id', 'N/A')
+    detail_id = Path(details_src).stem
+    title = task.get('title', 'Sem título')
+    description = task.get('description', '')
+    status = task.get('status', 'backlog')
+    priority = task.get('priority', 'medium')
+    assigned = task.get('assignedTo', None)
+    updated = format_datetime(task.get('updatedAt'))
     
-    # Agentes
-    agents = status.get('agents', {})
-    active_agents = len([a for a in agents.values() if a.get('status') == 'active'])
+    assigned_display = assigned.upper() if assigned else 'Não atribuído'
+    assigned_initial = assigned[0].upper() if assigned else '?'
     
-    # HTML
-    html = f"""<!DOCTYPE html>
-<html lang="pt-BR">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Facilita Factory Dashboard</title>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-            color: #2d3748;
-        }}
-        
-        .container {{
-            max-width: 1400px;
-            margin: 0 auto;
-        }}
-        
-        .header {{
-            background: white;
-            border-radius: 12px;
-            padding: 30px;
-            margin-bottom: 20px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-        }}
-        
-        .header h1 {{
-            font-size: 32px;
-            color: #667eea;
-            margin-bottom: 10px;
-        }}
-        
-        .header .subtitle {{
-            color: #718096;
-            font-size: 14px;
-        }}
-        
-        .stats {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 15px;
-            margin-bottom: 20px;
-        }}
-        
-        .stat-card {{
-            background: white;
-            border-radius: 12px;
-            padding: 20px;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-            transition: transform 0.2s;
-        }}
-        
-        .stat-card:hover {{
-            transform: translateY(-5px);
-        }}
-        
-        .stat-card .label {{
-            font-size: 12px;
-            text-transform: uppercase;
-            color: #a0aec0;
-            font-weight: 600;
-            margin-bottom: 5px;
-        }}
-        
-        .stat-card .value {{
-            font-size: 32px;
-            font-weight: bold;
-            color: #667eea;
-        }}
-        
-        .tabs {{
-            display: flex;
-            gap: 10px;
-            margin-bottom: 20px;
-        }}
-        
-        .tab {{
-            background: white;
-            border: none;
-            padding: 12px 24px;
-            border-radius: 8px;
-            cursor: pointer;
-            font-size: 14px;
-            font-weight: 600;
-            color: #718096;
-            transition: all 0.2s;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-        }}
-        
-        .tab.active {{
-            background: #667eea;
-            color: white;
-        }}
-        
-        .tab-content {{
-            display: none;
-        }}
-        
-        .tab-content.active {{
-            display: block;
-        }}
-        
-        .task-grid {{
-            display: grid;
-            gap: 15px;
-        }}
-        
-        .task-card {{
-            background: white;
-            border-radius: 12px;
-            padding: 20px;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-            transition: all 0.2s;
-            cursor: pointer;
-            border-left: 4px solid #667eea;
-        }}
-        
-        .task-card:hover {{
-            box-shadow: 0 8px 25px rgba(0,0,0,0.15);
-            transform: translateY(-2px);
-        }}
-        
-        .task-card.critical {{ border-left-color: #e74c3c; }}
-        .task-card.high {{ border-left-color: #e67e22; }}
-        .task-card.medium {{ border-left-color: #f39c12; }}
-        .task-card.low {{ border-left-color: #95a5a6; }}
-        
-        .task-header {{
-            display: flex;
-            justify-content: space-between;
-            align-items: start;
-            margin-bottom: 15px;
-        }}
-        
-        .task-title {{
-            font-size: 18px;
-            font-weight: bold;
-            color: #2d3748;
-            flex: 1;
-        }}
-        
-        .task-badges {{
-            display: flex;
-            gap: 8px;
-            flex-wrap: wrap;
-        }}
-        
-        .badge {{
-            padding: 4px 12px;
-            border-radius: 20px;
-            font-size: 12px;
-            font-weight: 600;
-            white-space: nowrap;
-        }}
-        
-        .badge.status {{
-            background: #edf2f7;
-            color: #4a5568;
-        }}
-        
-        .badge.priority {{
-            color: white;
-        }}
-        
-        .task-meta {{
-            font-size: 13px;
-            color: #718096;
-            margin-bottom: 10px;
-        }}
-        
-        .task-description {{
-            color: #4a5568;
-            font-size: 14px;
-            line-height: 1.6;
-            margin-bottom: 15px;
-        }}
-        
-        .task-footer {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            padding-top: 15px;
-            border-top: 1px solid #e2e8f0;
-        }}
-        
-        .assignee {{
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            font-size: 13px;
-            color: #4a5568;
-        }}
-        
-        .assignee-avatar {{
-            width: 28px;
-            height: 28px;
-            border-radius: 50%;
-            background: #667eea;
-            color: white;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-weight: bold;
-            font-size: 12px;
-        }}
-        
-        .task-details {{
-            display: none;
-            margin-top: 15px;
-            padding-top: 15px;
-            border-top: 1px solid #e2e8f0;
-        }}
-        
-        .task-details.expanded {{
-            display: block;
-        }}
-        
-        .detail-section {{
-            margin-bottom: 15px;
-        }}
-        
-        .detail-section h4 {{
-            font-size: 13px;
-            text-transform: uppercase;
-            color: #a0aec0;
-            margin-bottom: 8px;
-        }}
-        
-        .detail-section ul {{
-            list-style: none;
-            padding-left: 0;
-        }}
-        
-        .detail-section li {{
-            padding: 6px 0;
-            color: #4a5568;
-            font-size: 14px;
-        }}
-        
-        .detail-section li:before {{
-            content: "•";
-            color: #667eea;
-            font-weight: bold;
-            margin-right: 8px;
-        }}
-        
-        .agents-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 15px;
-        }}
-        
-        .agent-card {{
-            background: white;
-            border-radius: 12px;
-            padding: 20px;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-        }}
-        
-        .agent-card.active {{
-            border-left: 4px solid #48bb78;
-        }}
-        
-        .agent-card.idle {{
-            border-left: 4px solid #cbd5e0;
-        }}
-        
-        .agent-header {{
-            display: flex;
-            align-items: center;
-            gap: 12px;
-            margin-bottom: 12px;
-        }}
-        
-        .agent-avatar {{
-            width: 40px;
-            height: 40px;
-            border-radius: 50%;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-weight: bold;
-            font-size: 16px;
-        }}
-        
-        .agent-name {{
-            font-size: 18px;
-            font-weight: bold;
-            color: #2d3748;
-        }}
-        
-        .agent-status {{
-            font-size: 13px;
-            color: #718096;
-        }}
-        
-        .agent-task {{
-            background: #f7fafc;
-            padding: 12px;
-            border-radius: 8px;
-            font-size: 13px;
-            color: #4a5568;
-        }}
-        
-        .refresh-btn {{
-            position: fixed;
-            bottom: 30px;
-            right: 30px;
-            background: #667eea;
-            color: white;
-            border: none;
-            padding: 15px 25px;
-            border-radius: 50px;
-            font-weight: bold;
-            cursor: pointer;
-            box-shadow: 0 4px 20px rgba(102, 126, 234, 0.4);
-            transition: all 0.2s;
-        }}
-        
-        .refresh-btn:hover {{
-            background: #5a67d8;
-            transform: scale(1.05);
-        }}
-        
-        .empty-state {{
-            text-align: center;
-            padding: 60px 20px;
-            color: #a0aec0;
-        }}
-        
-        .empty-state h3 {{
-            font-size: 24px;
-            margin-bottom: 10px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🏭 Facilita Factory</h1>
-            <p class="subtitle">Dashboard de Acompanhamento • Atualizado em {datetime.now().strftime('%d/%m/%Y às %H:%M:%S')}</p>
-        </div>
-        
-        <div class="stats">
-            <div class="stat-card">
-                <div class="label">Total de Tasks</div>
-                <div class="value">{total_tasks}</div>
-            </div>
-            <div class="stat-card">
-                <div class="label">Tasks Ativas</div>
-                <div class="value">{active_tasks}</div>
-            </div>
-            <div class="stat-card">
-                <div class="label">Concluídas Hoje</div>
-                <div class="value">{done_today}</div>
-            </div>
-            <div class="stat-card">
-                <div class="label">Agentes Ativos</div>
-                <div class="value">{active_agents}/{len(agents)}</div>
-            </div>
-        </div>
-        
-        <div class="tabs">
-            <button class="tab active" onclick="showTab('tasks')">📋 Tasks</button>
-            <button class="tab" onclick="showTab('agents')">👥 Agentes</button>
-        </div>
-        
-        <div id="tasks-tab" class="tab-content active">
-            <div class="task-grid">
-"""
+    status_emoji = get_status_emoji(status)
+    priority_color = get_priority_color(priority)
+    factory = f"<strong>Factory:</strong> {task['factory']} • " if task.get('factory') else ''
     
-    # Tasks
-    if tasks:
-        for task in tasks:
-            task_id = task.get('id', 'N/A')
-            title = task.get('title', 'Sem título')
-            description = task.get('description', '')
-            status = task.get('status', 'backlog')
-            priority = task.get('priority', 'medium')
-            assigned = task.get('assignedTo', None)
-            created = format_datetime(task.get('createdAt'))
-            updated = format_datetime(task.get('updatedAt'))
-            notes = task.get('notes', [])
-            
-            assigned_display = assigned.upper() if assigned else 'Não atribuído'
-            assigned_initial = assigned[0].upper() if assigned else '?'
-            
-            status_emoji = get_status_emoji(status)
-            priority_color = get_priority_color(priority)
-            
-            html += f"""
-                <div class="task-card {priority}" onclick="toggleDetails('{task_id}')">
+    return f"""
+                <div class="task-card {priority}" onclick="toggleDetails('{detail_id}')">
                     <div class="task-header">
                         <div class="task-title">{status_emoji} {title}</div>
                         <div class="task-badges">
@@ -488,7 +1005,7 @@ def generate_html(tasks, status):
                     </div>
                     
                     <div class="task-meta">
-                        <strong>ID:</strong> {task_id} • <strong>Projeto:</strong> {task.get('project', 'N/A')}
+                        {factory}<strong>ID:</strong> {task_id} • <strong>Projeto:</strong> {task.get('project', 'N/A')}
                     </div>
                     
                     <div class="task-description">{description[:200]}{'...' if len(description) > 200 else ''}</div>
@@ -503,182 +1020,2264 @@ def generate_html(tasks, status):
                         </div>
                     </div>
                     
-                    <div class="task-details" id="details-{task_id}">
-                        <div class="detail-section">
-                            <h4>⏱️ Timestamps</h4>
-                            <ul>
-                                <li><strong>Criado:</strong> {created}</li>
-                                <li><strong>Atualizado:</strong> {updated}</li>
-                            </ul>
-                        </div>
-"""
-            
-            if notes:
-                html += """
-                        <div class="detail-section">
-                            <h4>📝 Notas</h4>
-                            <ul>
-"""
-                for note in notes:
-                    html += f"                                <li>{note}</li>\n"
-                html += """
-                            </ul>
-                        </div>
+                    <div class="task-details" id="details-{detail_id}" data-src="{details_src}"></div>
+                </div>
 """
-            
-            spec_file = task.get('specFile')
-            test_file = task.get('testScenariosFile')
-            if spec_file or test_file:
-                html += """
-                        <div class="detail-section">
-                            <h4>📂 Arquivos</h4>
-                            <ul>
-"""
-                if spec_file:
-                    html += f"                                <li><strong>Spec:</strong> <code>/home/ubuntu/facilita-factory/shared/{spec_file}</code></li>\n"
-                if test_file:
-                    html += f"                                <li><strong>Testes:</strong> <code>/home/ubuntu/facilita-factory/shared/{test_file}</code></li>\n"
-                html += """
-                            </ul>
-                        </div>
+
+def render_task_details(task, shared=None):
+    """Gera o HTML dos detalhes de uma task (details/<task>.html); os caminhos de
+    spec e testes ficam no `shared` da factory da task (padrão: SHARED)"""
+    shared = shared or SHARED
+    created = format_datetime(task.get('createdAt'))
+    updated = format_datetime(task.get('updatedAt'))
+    notes = task.get('notes', [])
+    
+    html = f"""<div class="detail-section">
+    <h4>⏱️ Timestamps</h4>
+    <ul>
+        <li><strong>Criado:</strong> {created}</li>
+        <li><strong>Atualizado:</strong> {updated}</li>
+    </ul>
+</div>
 """
-            
-            html += """
-                    </div>
-                </div>
+    
+    if notes:
+        html += """<div class="detail-section">
+    <h4>📝 Notas</h4>
+    <ul>
 """
-    else:
-        html += """
-                <div class="empty-state">
-                    <h3>📭 Nenhuma task encontrada</h3>
-                    <p>As tasks aparecerão aqui quando forem criadas.</p>
-                </div>
+        for note in notes:
+            html += f"        <li>{note}</li>\n"
+        html += """    </ul>
+</div>
 """
     
-    html += """
-            </div>
-        </div>
-        
-        <div id="agents-tab" class="tab-content">
-            <div class="agents-grid">
+    spec_file = task.get('specFile')
+    test_file = task.get('testScenariosFile')
+    if spec_file or test_file:
+        html += """<div class="detail-section">
+    <h4>📂 Arquivos</h4>
+    <ul>
+"""
+        if spec_file:
+            html += f"        <li><strong>Spec:</strong> <code>{shared}/{spec_file}</code></li>\n"
+        if test_file:
+            html += f"        <li><strong>Testes:</strong> <code>{shared}/{test_file}</code></li>\n"
+        html += """    </ul>
+</div>
 """
+    return html
+
+def agent_name(agent_id):
+    """Nome de exibição do agente ("<factory>/<agente>" com várias factories)"""
+    base = agent_id.rpartition('/')[2]
+    return AGENT_NAMES.get(base, base.upper())
+
+def render_agent_card(agent_id, agent_data, index):
+    """Gera o HTML do card de um agente"""
+    name = agent_name(agent_id)
+    status = agent_data.get('status', 'idle')
+    current_task = agent_data.get('currentTask')
     
-    # Agentes
-    agent_names = {
-        'pm': 'Lev (PM)',
-        'spec': 'Spec',
-        'dev-1': 'Dev-1',
-        'dev-2': 'Dev-2',
-        'support': 'Support',
-        'qa': 'QA',
-        'docs': 'Docs'
-    }
+    status_class = 'active' if status == 'active' else 'idle'
+    status_text = '🟢 Ativo' if status == 'active' else '⚪ Ocioso'
+    if agent_data.get('factory'):
+        status_text += f" • 🏭 {agent_data['factory']}"
     
-    for agent_id, agent_data in agents.items():
-        name = agent_names.get(agent_id, agent_id.upper())
-        status = agent_data.get('status', 'idle')
-        current_task = agent_data.get('currentTask')
-        
-        status_class = 'active' if status == 'active' else 'idle'
-        status_text = '🟢 Ativo' if status == 'active' else '⚪ Ocioso'
-        
-        html += f"""
+    html = f"""
                 <div class="agent-card {status_class}">
                     <div class="agent-header">
-                        <div class="agent-avatar">{agent_id[0].upper()}</div>
+                        <div class="agent-avatar">{agent_id.rpartition('/')[2][0].upper()}</div>
                         <div>
                             <div class="agent-name">{name}</div>
                             <div class="agent-status">{status_text}</div>
                         </div>
                     </div>
 """
-        
-        if current_task:
-            task_obj = next((t for t in tasks if t.get('id') == current_task), None)
-            task_title = task_obj.get('title', current_task) if task_obj else current_task
-            html += f"""
+    
+    if current_task:
+        task_obj = index.get(current_task, agent_data.get('factory'))
+        task_title = task_obj.get('title', current_task) if task_obj else current_task
+        html += f"""
                     <div class="agent-task">
                         <strong>Trabalhando em:</strong><br>{task_title}
                     </div>
 """
-        else:
-            html += """
+    else:
+        html += """
                     <div class="agent-task" style="color: #a0aec0;">
                         Aguardando atribuição
                     </div>
 """
-        
-        html += """
+    
+    html += """
+                </div>
+"""
+    return html
+
+# Estilos e scripts do dashboard: vão para arquivos com o hash do conteúdo no
+# nome (dashboard.<hash>.css/.js), que o server.py serve com cache imutável;
+# as páginas só carregam dados e markup
+DASHBOARD_CSS = """* { margin: 0; padding: 0; box-sizing: border-box; }
+
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, sans-serif;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    min-height: 100vh;
+    padding: 20px;
+    color: #2d3748;
+}
+
+.container {
+    max-width: 1400px;
+    margin: 0 auto;
+}
+
+.header {
+    background: white;
+    border-radius: 12px;
+    padding: 30px;
+    margin-bottom: 20px;
+    box-shadow: 0 10px 30px rgba(0,0,0,0.1);
+}
+
+.header h1 {
+    font-size: 32px;
+    color: #667eea;
+    margin-bottom: 10px;
+}
+
+.header .subtitle {
+    color: #718096;
+    font-size: 14px;
+}
+
+.stats {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+    gap: 15px;
+    margin-bottom: 20px;
+}
+
+.stat-card {
+    background: white;
+    border-radius: 12px;
+    padding: 20px;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+    transition: transform 0.2s;
+}
+
+.stat-card:hover {
+    transform: translateY(-5px);
+}
+
+.stat-card .label {
+    font-size: 12px;
+    text-transform: uppercase;
+    color: #a0aec0;
+    font-weight: 600;
+    margin-bottom: 5px;
+}
+
+.stat-card .value {
+    font-size: 32px;
+    font-weight: bold;
+    color: #667eea;
+}
+
+.tabs {
+    display: flex;
+    gap: 10px;
+    margin-bottom: 20px;
+}
+
+.tab {
+    background: white;
+    border: none;
+    padding: 12px 24px;
+    border-radius: 8px;
+    cursor: pointer;
+    font-size: 14px;
+    font-weight: 600;
+    color: #718096;
+    transition: all 0.2s;
+    box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+}
+
+.tab.active {
+    background: #667eea;
+    color: white;
+}
+
+.tab-content {
+    display: none;
+}
+
+.tab-content.active {
+    display: block;
+}
+
+.task-grid {
+    display: grid;
+    gap: 15px;
+}
+
+.task-card {
+    background: white;
+    border-radius: 12px;
+    padding: 20px;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+    transition: all 0.2s;
+    cursor: pointer;
+    border-left: 4px solid #667eea;
+}
+
+.task-card:hover {
+    box-shadow: 0 8px 25px rgba(0,0,0,0.15);
+    transform: translateY(-2px);
+}
+
+.task-card.critical { border-left-color: #e74c3c; }
+.task-card.high { border-left-color: #e67e22; }
+.task-card.medium { border-left-color: #f39c12; }
+.task-card.low { border-left-color: #95a5a6; }
+
+.task-header {
+    display: flex;
+    justify-content: space-between;
+    align-items: start;
+    margin-bottom: 15px;
+}
+
+.task-title {
+    font-size: 18px;
+    font-weight: bold;
+    color: #2d3748;
+    flex: 1;
+}
+
+.task-badges {
+    display: flex;
+    gap: 8px;
+    flex-wrap: wrap;
+}
+
+.badge {
+    padding: 4px 12px;
+    border-radius: 20px;
+    font-size: 12px;
+    font-weight: 600;
+    white-space: nowrap;
+}
+
+.badge.status {
+    background: #edf2f7;
+    color: #4a5568;
+}
+
+.badge.priority {
+    color: white;
+}
+
+.task-meta {
+    font-size: 13px;
+    color: #718096;
+    margin-bottom: 10px;
+}
+
+.task-description {
+    color: #4a5568;
+    font-size: 14px;
+    line-height: 1.6;
+    margin-bottom: 15px;
+}
+
+.task-footer {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    padding-top: 15px;
+    border-top: 1px solid #e2e8f0;
+}
+
+.assignee {
+    display: flex;
+    align-items: center;
+    gap: 8px;
+    font-size: 13px;
+    color: #4a5568;
+}
+
+.assignee-avatar {
+    width: 28px;
+    height: 28px;
+    border-radius: 50%;
+    background: #667eea;
+    color: white;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    font-weight: bold;
+    font-size: 12px;
+}
+
+.task-details {
+    display: none;
+    margin-top: 15px;
+    padding-top: 15px;
+    border-top: 1px solid #e2e8f0;
+}
+
+.task-details.expanded {
+    display: block;
+}
+
+.detail-section {
+    margin-bottom: 15px;
+}
+
+.detail-section h4 {
+    font-size: 13px;
+    text-transform: uppercase;
+    color: #a0aec0;
+    margin-bottom: 8px;
+}
+
+.detail-section ul {
+    list-style: none;
+    padding-left: 0;
+}
+
+.detail-section li {
+    padding: 6px 0;
+    color: #4a5568;
+    font-size: 14px;
+}
+
+.detail-section li:before {
+    content: "•";
+    color: #667eea;
+    font-weight: bold;
+    margin-right: 8px;
+}
+
+.agents-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+    gap: 15px;
+}
+
+.agent-card {
+    background: white;
+    border-radius: 12px;
+    padding: 20px;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+}
+
+.agent-card.active {
+    border-left: 4px solid #48bb78;
+}
+
+.agent-card.idle {
+    border-left: 4px solid #cbd5e0;
+}
+
+.agent-header {
+    display: flex;
+    align-items: center;
+    gap: 12px;
+    margin-bottom: 12px;
+}
+
+.agent-avatar {
+    width: 40px;
+    height: 40px;
+    border-radius: 50%;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    font-weight: bold;
+    font-size: 16px;
+}
+
+.agent-name {
+    font-size: 18px;
+    font-weight: bold;
+    color: #2d3748;
+}
+
+.agent-status {
+    font-size: 13px;
+    color: #718096;
+}
+
+.agent-task {
+    background: #f7fafc;
+    padding: 12px;
+    border-radius: 8px;
+    font-size: 13px;
+    color: #4a5568;
+}
+
+.factory-stats {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+    gap: 15px;
+    margin-bottom: 20px;
+}
+
+.factory-card {
+    background: white;
+    border-radius: 12px;
+    padding: 15px 20px;
+    border-left: 4px solid #667eea;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+    cursor: pointer;
+}
+
+.factory-card.stale {
+    border-left-color: #e67e22;
+}
+
+.factory-name {
+    font-weight: bold;
+    color: #2d3748;
+    margin-bottom: 6px;
+}
+
+.factory-numbers {
+    font-size: 13px;
+    color: #718096;
+}
+
+.factory-error {
+    font-size: 12px;
+    color: #e67e22;
+    margin-top: 6px;
+}
+
+.factory-filter {
+    margin-bottom: 20px;
+    padding: 10px 16px;
+    border: none;
+    border-radius: 8px;
+    font-size: 14px;
+    font-weight: 600;
+    color: #4a5568;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+}
+
+.history-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(400px, 1fr));
+    gap: 15px;
+}
+
+.chart-card {
+    background: white;
+    border-radius: 12px;
+    padding: 20px;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+}
+
+.chart-card h3 {
+    font-size: 16px;
+    color: #2d3748;
+    margin-bottom: 12px;
+}
+
+.chart {
+    display: block;
+    width: 100%;
+    height: auto;
+}
+
+.chart text {
+    font-size: 11px;
+    fill: #a0aec0;
+}
+
+.chart-footer {
+    display: flex;
+    justify-content: space-between;
+    font-size: 12px;
+    color: #718096;
+    margin-top: 8px;
+}
+
+.refresh-btn {
+    position: fixed;
+    bottom: 30px;
+    right: 30px;
+    background: #667eea;
+    color: white;
+    border: none;
+    padding: 15px 25px;
+    border-radius: 50px;
+    font-weight: bold;
+    cursor: pointer;
+    box-shadow: 0 4px 20px rgba(102, 126, 234, 0.4);
+    transition: all 0.2s;
+}
+
+.refresh-btn:hover {
+    background: #5a67d8;
+    transform: scale(1.05);
+}
+
+.empty-state {
+    text-align: center;
+    padding: 60px 20px;
+    color: #a0aec0;
+}
+
+.empty-state h3 {
+    font-size: 24px;
+    margin-bottom: 10px;
+}
+
+.shard-nav {
+    display: flex;
+    flex-wrap: wrap;
+    gap: 10px;
+    margin-bottom: 20px;
+}
+
+.shard-link {
+    background: white;
+    border-radius: 8px;
+    padding: 10px 16px;
+    color: #4a5568;
+    font-weight: 600;
+    text-decoration: none;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+}
+
+.shard-link span {
+    color: #667eea;
+    margin-left: 6px;
+}
+
+.more-tasks {
+    text-align: center;
+    color: white;
+    margin-top: 20px;
+    font-size: 14px;
+}
+
+.header a {
+    color: #667eea;
+    text-decoration: none;
+}
+
+.task-grid.virtual {
+    display: block;
+    position: relative;
+}
+
+.task-grid.virtual .task-card {
+    position: absolute;
+    left: 0;
+    right: 0;
+    overflow: hidden;
+}
+
+.task-grid.virtual .task-description {
+    display: -webkit-box;
+    -webkit-line-clamp: 2;
+    -webkit-box-orient: vertical;
+    overflow: hidden;
+}
+
+.detail-panel {
+    display: none;
+    position: fixed;
+    inset: 0;
+    background: rgba(0,0,0,0.4);
+    padding: 40px 20px;
+    overflow-y: auto;
+    z-index: 10;
+}
+
+.detail-panel.open {
+    display: block;
+}
+
+.detail-box {
+    position: relative;
+    max-width: 700px;
+    margin: 0 auto;
+    background: white;
+    border-radius: 12px;
+    padding: 25px;
+    box-shadow: 0 8px 25px rgba(0,0,0,0.15);
+}
+
+.detail-box h3 {
+    color: #2d3748;
+    padding-right: 30px;
+}
+
+.detail-close {
+    position: absolute;
+    top: 15px;
+    right: 15px;
+    border: none;
+    background: none;
+    font-size: 18px;
+    color: #a0aec0;
+    cursor: pointer;
+}
+"""
+
+# Constantes de apresentação usadas também no navegador (cards renderizados a partir do data.json)
+DASHBOARD_JS = (f"""const STATUS_EMOJIS = {json.dumps(STATUS_EMOJIS, ensure_ascii=False)};
+const PRIORITY_COLORS = {json.dumps(PRIORITY_COLORS)};
+const AGENT_NAMES = {json.dumps(AGENT_NAMES)};
+const DETAILS_DIR = {json.dumps(DETAILS_DIR)};
+
+""" + """function showTab(tabName) {
+    // Hide all tabs
+    document.querySelectorAll('.tab-content').forEach(content => {
+        content.classList.remove('active');
+    });
+    document.querySelectorAll('.tab').forEach(tab => {
+        tab.classList.remove('active');
+    });
+
+    // Show selected tab
+    document.getElementById(tabName + '-tab').classList.add('active');
+    event.target.classList.add('active');
+    if (taskList) taskList.schedule();
+}
+
+// detailId: nome do arquivo de detalhes (o id da task pode se repetir entre factories)
+function toggleDetails(detailId) {
+    const details = document.getElementById('details-' + detailId);
+    if (details.classList.contains('expanded')) {
+        details.classList.remove('expanded');
+    } else {
+        // Close all other details
+        document.querySelectorAll('.task-details').forEach(d => {
+            d.classList.remove('expanded');
+        });
+        details.classList.add('expanded');
+        loadDetails(details);
+    }
+}
+
+// Os detalhes de cada task ficam em details/<task>.html e só são baixados ao expandir
+function loadDetails(details) {
+    if (!details.dataset.src || details.dataset.loaded) return;
+    const src = details.dataset.src;
+    details.dataset.loaded = '1';
+    details.innerHTML = '<div class="detail-section">Carregando...</div>';
+    fetch(src).then(function(response) {
+        if (!response.ok) throw new Error(response.status);
+        return response.text();
+    }).then(function(html) {
+        if (details.dataset.src === src) details.innerHTML = html;
+    }).catch(function() {
+        if (details.dataset.src !== src) return;
+        delete details.dataset.loaded;
+        details.innerHTML = '<div class="detail-section">Não foi possível carregar os detalhes.</div>';
+    });
+}
+
+// Com o data.json (servidor ou GitHub Pages), as listas de tasks são renderizadas aqui:
+// só os cards visíveis (mais uma margem) ficam no DOM, e o refresh baixa só os dados
+// da página (data.json no index, data-<status>.json em cada página por status)
+const CARD_HEIGHT = 210;
+const CARD_GAP = 15;
+const OVERSCAN = 5;
+
+function el(tag, className, text) {
+    const node = document.createElement(tag);
+    if (className) node.className = className;
+    if (text !== undefined && text !== null) node.textContent = text;
+    return node;
+}
+
+// "2026-02-05T14:30:00-03:00" → "05/02/2026 14:30" (hora local da própria data, como no generate.py)
+function formatDate(iso, separator, seconds) {
+    const match = /^(\\d{4})-(\\d{2})-(\\d{2})T(\\d{2}):(\\d{2})(?::(\\d{2}))?/.exec(iso || '');
+    if (!match) return iso || 'N/A';
+    return match[3] + '/' + match[2] + '/' + match[1] + (separator || ' ') + match[4] + ':' + match[5] +
+        (seconds ? ':' + (match[6] || '00') : '');
+}
+
+function renderCard(task) {
+    const status = task.s || 'backlog';
+    const priority = task.p || 'medium';
+    const description = task.d || '';
+    const card = el('div', 'task-card ' + priority);
+    card.style.height = CARD_HEIGHT + 'px';
+    card.onclick = function() {
+        openDetails(task);
+    };
+
+    const header = el('div', 'task-header');
+    const badges = el('div', 'task-badges');
+    const badge = el('span', 'badge priority', priority.toUpperCase());
+    badge.style.background = PRIORITY_COLORS[priority] || '#95a5a6';
+    badges.append(el('span', 'badge status', status.toUpperCase()), badge);
+    header.append(el('div', 'task-title', (STATUS_EMOJIS[status] || '❓') + ' ' + (task.t || 'Sem título')), badges);
+
+    const meta = el('div', 'task-meta');
+    if (task.f) meta.append(el('strong', null, 'Factory:'), ' ' + task.f + ' • ');
+    meta.append(el('strong', null, 'ID:'), ' ' + (task.i || 'N/A') + ' • ',
+                el('strong', null, 'Projeto:'), ' ' + (task.j || 'N/A'));
+
+    const footer = el('div', 'task-footer');
+    const assignee = el('div', 'assignee');
+    assignee.append(el('div', 'assignee-avatar', task.a ? task.a[0].toUpperCase() : '?'),
+                    task.a ? task.a.toUpperCase() : 'Não atribuído');
+    const updated = el('div', null, 'Atualizado: ' + formatDate(task.u));
+    updated.style.cssText = 'font-size: 12px; color: #a0aec0;';
+    footer.append(assignee, updated);
+
+    card.append(header, meta, el('div', 'task-description', description.length > 200 ?
+        description.slice(0, 200) + '...' : description), footer);
+    return card;
+}
+
+// Detalhes num painel por cima da lista: a altura dos cards não muda
+function openDetails(task) {
+    let panel = document.getElementById('detail-panel');
+    if (!panel) {
+        panel = el('div', 'detail-panel');
+        panel.id = 'detail-panel';
+        panel.innerHTML = '<div class="detail-box"><button class="detail-close">✕</button>' +
+            '<h3></h3><div class="task-details expanded"></div></div>';
+        panel.onclick = function(e) {
+            if (e.target === panel || e.target.classList.contains('detail-close')) panel.classList.remove('open');
+        };
+        document.addEventListener('keydown', function(e) {
+            if (e.key === 'Escape') panel.classList.remove('open');
+        });
+        document.body.appendChild(panel);
+    }
+    panel.querySelector('h3').textContent = (STATUS_EMOJIS[task.s || 'backlog'] || '❓') + ' ' + (task.t || 'Sem título');
+    const details = panel.querySelector('.task-details');
+    details.dataset.src = DETAILS_DIR + '/' + (task.x || task.i) + '.html';
+    delete details.dataset.loaded;
+    loadDetails(details);
+    panel.classList.add('open');
+}
+
+function renderAgent(agent) {
+    const [agentId, status, taskTitle] = agent;
+    // Com várias factories o id é "<factory>/<agente>"
+    const slash = agentId.indexOf('/');
+    const baseId = agentId.slice(slash + 1);
+    const active = status === 'active';
+    const card = el('div', 'agent-card ' + (active ? 'active' : 'idle'));
+    const header = el('div', 'agent-header');
+    const info = el('div');
+    info.append(el('div', 'agent-name', AGENT_NAMES[baseId] || baseId.toUpperCase()),
+                el('div', 'agent-status', (active ? '🟢 Ativo' : '⚪ Ocioso') +
+                   (slash >= 0 ? ' • 🏭 ' + agentId.slice(0, slash) : '')));
+    header.append(el('div', 'agent-avatar', baseId[0].toUpperCase()), info);
+    const current = el('div', 'agent-task');
+    if (taskTitle !== undefined && taskTitle !== null) {
+        current.append(el('strong', null, 'Trabalhando em:'), el('br'), String(taskTitle));
+    } else {
+        current.textContent = 'Aguardando atribuição';
+        current.style.color = '#a0aec0';
+    }
+    card.append(header, current);
+    return card;
+}
+
+function renderFactory(row) {
+    const [name, total, active, doneToday, activeAgents, agents, error] = row;
+    const card = el('div', 'factory-card' + (error ? ' stale' : ''));
+    card.onclick = function() {
+        filterFactory(name);
+    };
+    card.append(el('div', 'factory-name', '🏭 ' + name),
+                el('div', 'factory-numbers', total + ' tasks • ' + active + ' ativas • ' + doneToday +
+                   ' hoje • 👥 ' + activeAgents + '/' + agents));
+    if (error) card.append(el('div', 'factory-error', '⚠️ ' + error + ' • dados da última leitura'));
+    return card;
+}
+
+// Atualiza no lugar o que vem do data.json: estatísticas, links por status e agentes
+function updateSummary(data) {
+    const stats = data.stats;
+    const values = {
+        total: stats.total,
+        active: stats.active,
+        doneToday: stats.doneToday,
+        agents: stats.activeAgents + '/' + stats.agents
+    };
+    document.querySelectorAll('[data-stat]').forEach(function(node) {
+        node.textContent = values[node.dataset.stat];
+    });
+    const updated = document.getElementById('updated-at');
+    if (updated) updated.textContent = formatDate(data.generatedAt, ' às ', true);
+    const nav = document.getElementById('shard-nav');
+    if (nav) {
+        nav.replaceChildren(...data.shards.map(function(shard) {
+            const link = el('a', 'shard-link', (STATUS_EMOJIS[shard[0]] || '❓') + ' ' +
+                (shard[0] || 'sem status').toUpperCase());
+            link.href = shard[2];
+            link.append(el('span', null, shard[1]));
+            return link;
+        }));
+    }
+    const agents = document.getElementById('agents-grid');
+    if (agents) agents.replaceChildren(...data.agents.map(renderAgent));
+    const factories = document.getElementById('factory-stats');
+    if (factories && data.factories) factories.replaceChildren(...data.factories.map(renderFactory));
+    const more = document.getElementById('more-tasks');
+    if (more) {
+        more.hidden = data.tasks.length >= stats.total;
+        more.textContent = 'Mostrando as ' + data.tasks.length + ' tasks mais recentes de ' + stats.total +
+            ' • veja todas nas páginas por status acima';
+    }
+}
+
+class TaskList {
+    constructor(grid) {
+        this.grid = grid;
+        this.status = grid.dataset.status;
+        this.factory = '';
+        this.data = null;
+        this.tasks = [];
+        this.cards = new Map();
+        this.range = null;
+        this.frame = null;
+        window.addEventListener('scroll', () => this.schedule(), {passive: true});
+        window.addEventListener('resize', () => this.schedule());
+    }
+
+    load() {
+        return fetch(this.grid.dataset.source, {cache: 'no-cache'}).then(function(response) {
+            if (!response.ok) throw new Error(response.status);
+            return response.json();
+        }).then(data => this.apply(data));
+    }
+
+    apply(data) {
+        this.data = data;
+        const fields = data.fields;
+        const tasks = [];
+        data.tasks.forEach(row => {
+            const task = {};
+            fields.forEach(function(field, i) {
+                task[field] = row[i];
+            });
+            if ((this.status === undefined || (task.s || '') === this.status) &&
+                (!this.factory || task.f === this.factory)) tasks.push(task);
+        });
+        this.tasks = tasks;
+        if (this.status === undefined) {
+            updateSummary(data);
+        } else {
+            document.querySelectorAll('[data-count]').forEach(node => {
+                node.textContent = tasks.length;
+            });
+            // A página por status recebe todas as suas tasks no data-<status>.json
+            const more = document.getElementById('more-tasks');
+            if (more) more.hidden = true;
+        }
+        this.cards = new Map();
+        this.range = null;
+        this.render();
+    }
+
+    schedule() {
+        if (this.frame !== null) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render();
+        });
+    }
+
+    render() {
+        const count = this.tasks.length;
+        if (!count) {
+            if (this.range !== '') {
+                this.range = '';
+                this.grid.classList.remove('virtual');
+                this.grid.style.height = '';
+                this.grid.innerHTML = '<div class="empty-state"><h3>📭 Nenhuma task encontrada</h3>' +
+                    '<p>As tasks aparecerão aqui quando forem criadas.</p></div>';
+            }
+            return;
+        }
+        const row = CARD_HEIGHT + CARD_GAP;
+        this.grid.classList.add('virtual');
+        this.grid.style.height = (count * row - CARD_GAP) + 'px';
+        const top = this.grid.getBoundingClientRect().top;
+        const first = Math.max(0, Math.floor(-top / row) - OVERSCAN);
+        const last = Math.max(first, Math.min(count, Math.ceil((window.innerHeight - top) / row) + OVERSCAN));
+        const range = first + ':' + last;
+        if (range === this.range) return;
+        this.range = range;
+        const cards = new Map();
+        for (let i = first; i < last; i++) {
+            let card = this.cards.get(i);
+            if (!card) {
+                card = renderCard(this.tasks[i]);
+                card.style.top = (i * row) + 'px';
+            }
+            cards.set(i, card);
+        }
+        this.grid.replaceChildren(...cards.values());
+        this.cards = cards;
+    }
+}
+
+// Filtro por factory (só com várias): a lista é refeita com os dados já baixados
+function filterFactory(name) {
+    const select = document.getElementById('factory-filter');
+    if (select) select.value = name;
+    if (taskList && taskList.data) {
+        taskList.factory = name;
+        taskList.apply(taskList.data);
+    }
+}
+
+// Auto-refresh a cada 30 segundos (fallback quando não há /events): com o data.json
+// só os dados são baixados e a página é atualizada no lugar; sem ele, recarrega
+let refreshTimer = null;
+let live = false;
+const taskGrid = document.getElementById('task-grid');
+let taskList = taskGrid && taskGrid.dataset.source && window.fetch ? new TaskList(taskGrid) : null;
+
+function scheduleRefresh(delay) {
+    clearTimeout(refreshTimer);
+    refreshTimer = setTimeout(refresh, delay);
+}
+
+function refresh() {
+    clearTimeout(refreshTimer);
+    if (!taskList) {
+        window.location.reload();
+        return;
+    }
+    taskList.load().catch(function() {}).then(function() {
+        if (!live) scheduleRefresh(30000);
+    });
+}
+
+if (taskList) {
+    // Aberto via file:// (ou sem data.json): fica com os cards da página
+    taskList.load().catch(function() {
+        taskList = null;
+    });
+}
+scheduleRefresh(30000);
+
+// Com o server.py: atualiza só quando tasks/status mudam (dá tempo do --watch regenerar).
+// Em uma queda o EventSource reconecta sozinho; se ele desiste (503, /events fora do ar)
+// a conexão é reaberta com backoff. Enquanto isso vale o refresh de 30s
+let eventsDelay = 5000;
+let eventsMissed = false;
+
+function connectEvents() {
+    const events = new EventSource('../events');
+    events.onopen = function() {
+        live = true;
+        eventsDelay = 5000;
+        clearTimeout(refreshTimer);
+        // Reconectou: busca o que mudou enquanto estava fora
+        if (eventsMissed) {
+            eventsMissed = false;
+            refresh();
+        }
+    };
+    events.addEventListener('change', function() {
+        scheduleRefresh(1500);
+    });
+    events.onerror = function() {
+        if (live) {
+            live = false;
+            eventsMissed = true;
+            scheduleRefresh(30000);
+        }
+        if (events.readyState === EventSource.CLOSED) {
+            setTimeout(connectEvents, eventsDelay);
+            eventsDelay = Math.min(eventsDelay * 2, 300000);
+        }
+    };
+}
+
+if (window.EventSource) connectEvents();
+""")
+
+def asset_name(stem, ext, content):
+    """Nome do arquivo estático com o hash do conteúdo (muda só quando o conteúdo muda)"""
+    return f"{stem}.{hashlib.sha256(content.encode('utf-8')).hexdigest()[:10]}.{ext}"
+
+CSS_FILE = asset_name("dashboard", "css", DASHBOARD_CSS)
+JS_FILE = asset_name("dashboard", "js", DASHBOARD_JS)
+ASSETS = {CSS_FILE: DASHBOARD_CSS, JS_FILE: DASHBOARD_JS}
+
+# Início da página (doctype e links para os estáticos); igual em todas as gerações
+PAGE_HEAD = f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Facilita Factory Dashboard</title>
+    <link rel="stylesheet" href="{CSS_FILE}">
+    <script src="{JS_FILE}" defer></script>
+</head>
+<body>
+    <div class="container">
+"""
+
+def task_cards(index, keys, fragments=None):
+    """Fragmentos dos cards das tasks `keys` (ou o estado vazio); com
+    `fragments`, os cards de tasks que não mudaram vêm do cache"""
+    if not keys:
+        yield """
+                <div class="empty-state">
+                    <h3>📭 Nenhuma task encontrada</h3>
+                    <p>As tasks aparecerão aqui quando forem criadas.</p>
                 </div>
 """
+    for key in keys:
+        details_src = f"{DETAILS_DIR}/{detail_name(key)}"
+        digest = index.hashes.get(key) if fragments is not None else None
+        if digest is None:
+            yield render_task_card(index.tasks[key], details_src)
+        else:
+            yield fragments.get(f"card:{digest}:{details_src}",
+                                lambda: render_task_card(index.tasks[key], details_src))
+
+def status_shards(index, archive=None):
+    """(status, arquivo da página, chaves) de cada status, na ordem do fluxo.
+
+    Com `archive`, as chaves de 'done' são só as da janela recente.
+    """
+    statuses = sorted(index.by_status, key=lambda s: (
+        STATUS_ORDER.index(s) if s in STATUS_ORDER else len(STATUS_ORDER), str(s)))
+    for status in statuses:
+        slug = detail_name(str(status or 'sem-status'))[:-5]
+        keys = index.by_status[status]
+        if status == 'done' and archive is not None:
+            keys = archive.live
+        yield status, f"status-{slug}.html", keys
+
+def shard_data_name(page):
+    """Dados da lista virtualizada de uma página por status: status-done.html → data-done.json"""
+    return f"data-{page[len('status-'):-len('.html')]}.json"
+
+def render_factory_stats(rows):
+    """Cards de estatística por factory (linhas de factory_stats); clicar filtra as tasks"""
+    html = """        <div class="factory-stats" id="factory-stats">
+"""
+    for name, total, active, done_today, active_agents, agents, error in rows:
+        warning = f"""
+                <div class="factory-error">⚠️ {error} • dados da última leitura</div>""" if error else ''
+        html += f"""            <div class="factory-card{' stale' if error else ''}" onclick="filterFactory('{name}')">
+                <div class="factory-name">🏭 {name}</div>
+                <div class="factory-numbers">{total} tasks • {active} ativas • {done_today} hoje • 👥 {active_agents}/{agents}</div>{warning}
+            </div>
+"""
+    return html + """        </div>
+        
+"""
+
+def render_factory_filter(names):
+    """Seletor de factory da lista de tasks (só com várias factories)"""
+    if not names:
+        return ''
+    options = ''.join(f'<option value="{name}">🏭 {name}</option>' for name in names)
+    return f"""            <select class="factory-filter" id="factory-filter" onchange="filterFactory(this.value)"><option value="">Todas as factories</option>{options}</select>
+"""
+
+def render_page(index, status, archive=None, fragments=None, history=None):
+    """Gera o index.html em fragmentos: estatísticas, links para as páginas por
+    status, só as INDEX_TASK_LIMIT tasks mais recentes (tamanho constante) e,
+    com `history` (StatusHistory), a aba de gráficos"""
     
-    html += """
+    # Estatísticas (contadores já mantidos pelo TaskIndex)
+    total_tasks = len(index)
+    active_tasks = index.active_count
+    done_today = status.get('tasks', {}).get('done_today', 0)
+    recent = index.ordered_keys(limit=INDEX_TASK_LIMIT, skip=archive.archived if archive else None)
+    
+    # Agentes
+    agents = status.get('agents', {})
+    active_agents = len([a for a in agents.values() if a.get('status') == 'active'])
+    
+    # HTML
+    yield PAGE_HEAD
+    yield f"""        <div class="header">
+            <h1>🏭 Facilita Factory</h1>
+            <p class="subtitle">Dashboard de Acompanhamento • Atualizado em <span id="updated-at">{datetime.now().strftime('%d/%m/%Y às %H:%M:%S')}</span></p>
+        </div>
+        
+        <div class="stats">
+            <div class="stat-card">
+                <div class="label">Total de Tasks</div>
+                <div class="value" data-stat="total">{total_tasks}</div>
+            </div>
+            <div class="stat-card">
+                <div class="label">Tasks Ativas</div>
+                <div class="value" data-stat="active">{active_tasks}</div>
+            </div>
+            <div class="stat-card">
+                <div class="label">Concluídas Hoje</div>
+                <div class="value" data-stat="doneToday">{done_today}</div>
+            </div>
+            <div class="stat-card">
+                <div class="label">Agentes Ativos</div>
+                <div class="value" data-stat="agents">{active_agents}/{len(agents)}</div>
             </div>
         </div>
-    </div>
+        
+{render_factory_stats(factory_stats(index, status)) if 'factories' in status else ''}        <div class="tabs">
+            <button class="tab active" onclick="showTab('tasks')">📋 Tasks</button>
+            <button class="tab" onclick="showTab('agents')">👥 Agentes</button>
+"""
+    if history is not None:
+        yield """            <button class="tab" onclick="showTab('history')">📈 Histórico</button>
+"""
+    yield """        </div>
+        
+        <div id="tasks-tab" class="tab-content active">
+            <div class="shard-nav" id="shard-nav">
+"""
     
-    <button class="refresh-btn" onclick="window.location.reload()">🔄 Atualizar</button>
+    # Uma página por status
+    for task_status, filename, _keys in status_shards(index):
+        yield f"""                <a class="shard-link" href="{filename}">{get_status_emoji(task_status)} {str(task_status or 'sem status').upper()}<span>{index.count(task_status)}</span></a>
+"""
     
-    <script>
-        function showTab(tabName) {
-            // Hide all tabs
-            document.querySelectorAll('.tab-content').forEach(content => {
-                content.classList.remove('active');
-            });
-            document.querySelectorAll('.tab').forEach(tab => {
-                tab.classList.remove('active');
-            });
-            
-            // Show selected tab
-            document.getElementById(tabName + '-tab').classList.add('active');
-            event.target.classList.add('active');
-        }
+    yield f"""            </div>
+{render_factory_filter(list(status.get('factories', ())))}            <div class="task-grid" id="task-grid" data-source="{DATA_FILE}">
+"""
+    
+    # Tasks
+    yield from task_cards(index, recent, fragments)
+    
+    yield """
+            </div>
+"""
+    if total_tasks > len(recent):
+        yield f"""            <p class="more-tasks" id="more-tasks">Mostrando as {len(recent)} tasks mais recentes de {total_tasks} • veja todas nas páginas por status acima</p>
+"""
+    yield """        </div>
         
-        function toggleDetails(taskId) {
-            const details = document.getElementById('details-' + taskId);
-            if (details.classList.contains('expanded')) {
-                details.classList.remove('expanded');
-            } else {
-                // Close all other details
-                document.querySelectorAll('.task-details').forEach(d => {
-                    d.classList.remove('expanded');
-                });
-                details.classList.add('expanded');
-            }
-        }
+        <div id="agents-tab" class="tab-content">
+            <div class="agents-grid" id="agents-grid">
+"""
+    
+    # Agentes
+    for agent_id, agent_data in agents.items():
+        yield render_agent_card(agent_id, agent_data, index)
+    
+    yield """
+            </div>
+        </div>
+"""
+    if history is not None:
+        yield render_history(history)
+    yield PAGE_TAIL
+
+def render_chart(points, kind, color, max_value=None, width=600, height=160):
+    """Gráfico SVG inline (sem JS): barras ou linha de [(x, valor)]"""
+    top = max_value or max([value for _, value in points] + [1])
+    step = width / len(points)
+    scale = (height - 20) / top
+    parts = [f'<svg class="chart" viewBox="0 0 {width} {height}" role="img">',
+             f'<line x1="0" y1="{height}" x2="{width}" y2="{height}" stroke="#e2e8f0"/>',
+             f'<text x="4" y="12">{top:g}</text>']
+    if kind == 'bars':
+        for position, (_, value) in enumerate(points):
+            bar = value * scale
+            parts.append(f'<rect x="{position * step + 1:.1f}" y="{height - bar:.1f}" '
+                         f'width="{max(step - 2, 1):.1f}" height="{bar:.1f}" fill="{color}"/>')
+    else:
+        line = ' '.join(f'{(position + 0.5) * step:.1f},{height - value * scale:.1f}'
+                        for position, (_, value) in enumerate(points))
+        parts.append(f'<polyline points="{line}" fill="none" stroke="{color}" stroke-width="2"/>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+def render_history(history, hours=HISTORY_CHART_HOURS):
+    """Aba de histórico: throughput e utilização dos agentes por hora (nível 'hour')"""
+    points = history.hourly(hours)
+    html = """
+        <div id="history-tab" class="tab-content">
+"""
+    if len(points) < 2:
+        return html + """            <div class="empty-state">
+                <h3>📈 Coletando histórico</h3>
+                <p>Os gráficos aparecem depois de algumas horas de gerações</p>
+            </div>
+        </div>
+"""
+    start = datetime.fromtimestamp(points[0][0]).strftime('%d/%m %H:%M')
+    end = datetime.fromtimestamp(points[-1][0]).strftime('%d/%m %H:%M')
+    throughput = [(ts, done) for ts, done, _ in points]
+    utilisation = [(ts, value) for ts, _, value in points]
+    total = sum(done for _, done in throughput)
+    average = sum(value for _, value in utilisation) / len(utilisation)
+    return html + f"""            <div class="history-grid">
+                <div class="chart-card">
+                    <h3>📦 Tasks concluídas por hora</h3>
+                    {render_chart(throughput, 'bars', '#667eea')}
+                    <div class="chart-footer"><span>{start}</span><span>{total:g} em {len(points)}h</span><span>{end}</span></div>
+                </div>
+                <div class="chart-card">
+                    <h3>👥 Agentes ativos (%)</h3>
+                    {render_chart(utilisation, 'line', '#48bb78', max_value=100)}
+                    <div class="chart-footer"><span>{start}</span><span>média {average:.0f}%</span><span>{end}</span></div>
+                </div>
+            </div>
+        </div>
+"""
+
+def data_row(key, task):
+    """Linha compacta de uma task no data.json (nulos no final são omitidos)"""
+    task_id = task.get('id')
+    details = detail_name(key)[:-5]
+    row = [task_id, task.get('title'), (task.get('description') or '')[:DESCRIPTION_PREVIEW + 1],
+           task.get('status'), task.get('priority'), task.get('assignedTo'), task.get('project'),
+           task.get('updatedAt'), None if details == task_id else details, task.get('factory')]
+    while row and row[-1] is None:
+        row.pop()
+    return row
+
+def data_rows(index, keys):
+    """Fim de um arquivo de dados em fragmentos: as tasks `keys`, uma por linha"""
+    separator = '\n'
+    for key in keys:
+        yield separator + json.dumps(data_row(key, index.tasks[key]), ensure_ascii=False, separators=(',', ':'))
+        separator = ',\n'
+    yield '\n]}\n'
+
+def render_data(index, status, archive=None):
+    """Gera o data.json do index.html em fragmentos (uma task por linha): estatísticas,
+    contagem por status, agentes, estatísticas por factory (se houver várias) e só as
+    INDEX_TASK_LIMIT tasks mais recentes fora do arquivo (tamanho constante; cada
+    página por status tem o seu data-<status>.json)"""
+    agents = status.get('agents', {})
+    agent_rows = []
+    for agent_id, agent_data in agents.items():
+        current_task = agent_data.get('currentTask')
+        task_obj = index.get(current_task, agent_data.get('factory')) if current_task else None
+        agent_rows.append([agent_id, agent_data.get('status', 'idle'),
+                           task_obj.get('title', current_task) if task_obj else current_task])
+    head = {
+        'generatedAt': datetime.now().isoformat(timespec='seconds'),
+        'stats': {
+            'total': len(index),
+            'active': index.active_count,
+            'doneToday': status.get('tasks', {}).get('done_today', 0),
+            'activeAgents': len([a for a in agents.values() if a.get('status') == 'active']),
+            'agents': len(agents),
+        },
+        'shards': [[task_status, index.count(task_status), filename]
+                   for task_status, filename, _keys in status_shards(index)],
+        'agents': agent_rows,
+        'fields': DATA_FIELDS,
+    }
+    if 'factories' in status:
+        head['factories'] = factory_stats(index, status)
+    yield json.dumps(head, ensure_ascii=False, separators=(',', ':'))[:-1] + ',"tasks":['
+    yield from data_rows(index, index.ordered_keys(limit=INDEX_TASK_LIMIT, skip=archive.archived if archive else None))
+
+def render_shard_data(index, keys):
+    """Gera o data-<status>.json de uma página por status: só as tasks `keys`,
+    das mais recentes para as antigas"""
+    head = {'generatedAt': datetime.now().isoformat(timespec='seconds'), 'fields': DATA_FIELDS}
+    yield json.dumps(head, ensure_ascii=False, separators=(',', ':'))[:-1] + ',"tasks":['
+    yield from data_rows(index, index.ordered_keys(keys=keys))
+
+def render_status_page(index, task_status, keys, archive=None, fragments=None, source=None):
+    """Gera a página com as tasks de um status (de 'done', só a janela recente).
+
+    Com `source` (o data-<status>.json) a lista completa é renderizada no navegador:
+    o HTML leva só as INDEX_TASK_LIMIT primeiras, como primeira pintura.
+    """
+    yield PAGE_HEAD
+    yield f"""        <div class="header">
+            <h1>{get_status_emoji(task_status)} {str(task_status or 'sem status').upper()}</h1>
+            <p class="subtitle"><a href="index.html">← Voltar ao dashboard</a> • <span data-count>{len(keys)}</span> task(s)</p>
+        </div>
+        
+        <div class="tab-content active">
+"""
+    if task_status == 'done' and archive is not None and archive.pages:
+        yield """            <div class="shard-nav">
+"""
+        for number, page in enumerate(archive.pages):
+            yield f"""                <a class="shard-link" href="{archive.page_name(number)}">📦 Arquivo {number + 1}<span>{len(page)}</span></a>
+"""
+        yield """            </div>
+"""
+    factories = sorted(name for name in index.by_factory if name is not None)
+    source = f' data-source="{source}" data-status="{task_status or ""}"' if source else ''
+    shown = index.ordered_keys(keys=keys, limit=INDEX_TASK_LIMIT if source else None)
+    yield f"""{render_factory_filter(factories)}            <div class="task-grid" id="task-grid"{source}>
+"""
+    yield from task_cards(index, shown, fragments)
+    yield """
+            </div>
+"""
+    if len(keys) > len(shown):
+        yield f"""            <p class="more-tasks" id="more-tasks">Mostrando as {len(shown)} tasks mais recentes de {len(keys)} • a lista completa aparece com o dashboard servido (server.py ou GitHub Pages)</p>
+"""
+    yield """        </div>
+"""
+    yield PAGE_TAIL
+
+def render_archive_page(index, number, keys, fragments=None):
+    """Gera uma página do arquivo de tasks done (na ordem em que saíram da janela)"""
+    keys = [key for key in keys if key in index.tasks]
+    yield PAGE_HEAD
+    yield f"""        <div class="header">
+            <h1>📦 Arquivo de tasks concluídas • {number + 1}</h1>
+            <p class="subtitle"><a href="status-done.html">← Voltar às concluídas</a> • {len(keys)} task(s)</p>
+        </div>
         
-        // Auto-refresh a cada 30 segundos
-        setTimeout(function() {
-            window.location.reload();
-        }, 30000);
-    </script>
+        <div class="tab-content active">
+            <div class="task-grid">
+"""
+    yield from task_cards(index, keys, fragments)
+    yield """
+            </div>
+        </div>
+"""
+    yield PAGE_TAIL
+
+# Fim da página (botão de refresh); igual em todas as páginas
+PAGE_TAIL = """    </div>
+    
+    <button class="refresh-btn" onclick="refresh()">🔄 Atualizar</button>
 </body>
 </html>
 """
-    
-    return html
+
+def generate_html(tasks, status):
+    """Gera HTML do dashboard"""
+    return ''.join(render_page(TaskIndex.from_tasks(tasks), status))
+
+def task_timestamp(task):
+    """updatedAt (ou createdAt) da task em segundos; 0 se ausente/inválido"""
+    value = task.get('updatedAt') or task.get('createdAt')
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return 0
+
+class DoneArchive:
+    """Janela de tasks done e páginas de arquivo append-only.
+
+    Fica na página de 'done' só quem terminou nos últimos `days` dias (no
+    máximo `limit` tasks). As que saem da janela são anexadas, na ordem em que
+    saíram, à última página do arquivo; uma página cheia (`page_size` tasks) é
+    gravada uma única vez e nunca mais renderizada. O estado (páginas e chaves
+    arquivadas) fica em .cache/archive.json.
+    """
+
+    def __init__(self, path=None, days=DONE_WINDOW_DAYS, limit=DONE_WINDOW_TASKS,
+                 page_size=ARCHIVE_PAGE_SIZE):
+        self.path = Path(path or ARCHIVE_FILE)
+        self.days = days
+        self.limit = limit
+        self.page_size = page_size
+        state = load_json(self.path)
+        if state.get('pageSize') != page_size:
+            state = {}
+        self.pages = state.get('pages', [])
+        self.archived = set(state.get('archived', []))
+        self.live = set()
+        self.changed = set()
+
+    @staticmethod
+    def page_name(number):
+        return f"archive-done-{number + 1:04d}.html"
+
+    def is_frozen(self, number):
+        return len(self.pages[number]) >= self.page_size
+
+    def update(self, index, now=None):
+        """Recalcula a janela; retorna as páginas do arquivo que mudaram"""
+        # Task reaberta ou removida volta a ser elegível (a página antiga não muda)
+        self.archived = {key for key in self.archived if (index.tasks.get(key) or {}).get('status') == 'done'}
+        candidates = [key for key in index.by_status.get('done', ()) if key not in self.archived]
+        candidates.sort(key=lambda key: (task_timestamp(index.tasks[key]), key), reverse=True)
+        cutoff = (now or time.time()) - self.days * 86400
+        self.live = set()
+        expired = []
+        for position, key in enumerate(candidates):
+            if (self.limit and position >= self.limit) or (self.days and task_timestamp(index.tasks[key]) < cutoff):
+                expired.append(key)
+            else:
+                self.live.add(key)
+        self.changed = set()
+        for key in reversed(expired):
+            if not self.pages or self.is_frozen(len(self.pages) - 1):
+                self.pages.append([])
+            number = len(self.pages) - 1
+            self.pages[number].append(key)
+            self.archived.add(key)
+            self.changed.add(number)
+        return self.changed
+
+    def save(self):
+        write_atomic(self.path, [json.dumps({'pageSize': self.page_size, 'pages': self.pages,
+                                             'archived': sorted(self.archived)})])
+
+def template_version():
+    """Versão dos fragmentos em cache: CARD_TEMPLATE_VERSION + hash do código que os gera"""
+    h = hashlib.sha1(str(CARD_TEMPLATE_VERSION).encode())
+    for function in (format_datetime, get_status_emoji, get_priority_color,
+                     render_task_card, render_task_details):
+        h.update(inspect.getsource(function).encode())
+    h.update(json.dumps([STATUS_EMOJIS, PRIORITY_COLORS], sort_keys=True).encode())
+    return h.hexdigest()[:16]
+
+class FragmentCache:
+    """Cache persistente de fragmentos renderizados (card e detalhes das tasks).
+
+    A chave inclui o hash do arquivo da task (o do manifesto); o valor é o
+    HTML já em bytes, que vai direto para o arquivo de saída. Fica em
+    .cache/fragments.pack: uma linha JSON com a versão do template e
+    [chave, tamanho] de cada fragmento, do menos ao mais usado, seguida dos
+    fragmentos concatenados (carregar é ler e fatiar, sem parsear 20k
+    strings). LRU limitado a `max_bytes`; com outra versão do template o cache
+    começa vazio. Só é regravado quando algo entra ou sai.
+    """
+
+    def __init__(self, path=None, max_bytes=FRAGMENT_CACHE_BYTES, version=None):
+        self.path = Path(path or FRAGMENTS_FILE)
+        self.max_bytes = max_bytes
+        self.version = version or template_version()
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                header = json.loads(f.readline())
+                data = f.read()
+        except (OSError, ValueError):
+            return
+        if header.get('version') != self.version:
+            # Template mudou: tudo que está no arquivo é inválido
+            self.dirty = True
+            return
+        offset = 0
+        for key, length in header.get('entries', []):
+            self.entries[key] = data[offset:offset + length]
+            offset += length
+        self.size = offset
+
+    def get(self, key, render):
+        """Fragmento de `key`; chama render() só se não estiver no cache"""
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = render().encode('utf-8')
+        self.entries[key] = value
+        self.size += len(value)
+        self.dirty = True
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+        return value
+
+    def save(self):
+        if not self.dirty:
+            return
+        header = {'version': self.version,
+                  'entries': [[key, len(value)] for key, value in self.entries.items()]}
+        head = json.dumps(header, separators=(',', ':')).encode('utf-8') + b'\n'
+        write_atomic(self.path, [head, *self.entries.values()])
+        self.dirty = False
+
+class StatusHistory:
+    """Série temporal compacta do status, em níveis (HISTORY_TIERS).
+
+    Cada nível é um arquivo append-only de doubles (array('d')) em
+    .cache/history/<nível>.f64, um registro de len(HISTORY_FIELDS) valores:
+    início do bucket, amostras, tasks done, tasks ativas, done_today (último
+    valor do bucket) e agentes ativos/total (média das amostras). Cada amostra
+    vai para 'raw'; os minutos já fechados de 'raw' viram registros em
+    'minute' e as horas fechadas de 'minute' em 'hour'. Um nível com mais de
+    1,5x o seu máximo é reescrito só com os registros mais recentes, então o
+    tamanho é limitado e os gráficos leem só o nível 'hour'.
+    """
+
+    RECORD_BYTES = len(HISTORY_FIELDS) * array('d').itemsize
+
+    def __init__(self, root=None, tiers=HISTORY_TIERS):
+        self.root = Path(root or HISTORY_DIR)
+        self.tiers = tiers
+
+    def path(self, tier):
+        return self.root / f"{tier}.f64"
+
+    def read(self, tier, since=None):
+        """Registros do nível (tuplas na ordem de HISTORY_FIELDS), a partir de `since`"""
+        values = array('d')
+        try:
+            values.frombytes(self.path(tier).read_bytes())
+        except FileNotFoundError:
+            return []
+        width = len(HISTORY_FIELDS)
+        # Registro incompleto no fim (escrita interrompida) é ignorado
+        end = len(values) - len(values) % width
+        first = bisect.bisect_left(values[0:end:width], since) if since is not None else 0
+        return [tuple(values[i:i + width]) for i in range(first * width, end, width)]
+
+    def last(self, tier):
+        """Último registro do nível (lê só o fim do arquivo)"""
+        try:
+            with open(self.path(tier), 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                end = size - size % self.RECORD_BYTES
+                if not end:
+                    return None
+                f.seek(end - self.RECORD_BYTES)
+                values = array('d')
+                values.frombytes(f.read(self.RECORD_BYTES))
+        except FileNotFoundError:
+            return None
+        return tuple(values)
+
+    def append(self, tier, records):
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(tier)
+        with open(path, 'ab') as f:
+            # Descarta um registro incompleto deixado por uma escrita interrompida
+            size = f.tell()
+            if size % self.RECORD_BYTES:
+                f.truncate(size - size % self.RECORD_BYTES)
+            array('d', [value for record in records for value in record]).tofile(f)
+
+    def compact(self, tier, limit):
+        try:
+            count = self.path(tier).stat().st_size // self.RECORD_BYTES
+        except FileNotFoundError:
+            return
+        if count > limit * 1.5:
+            values = array('d', [value for record in self.read(tier)[-limit:] for value in record])
+            write_atomic(self.path(tier), [values.tobytes()])
+
+    @staticmethod
+    def rollup(bucket, records):
+        """Um registro agregado: contadores do fim do bucket, média ponderada dos agentes"""
+        samples = sum(r[1] for r in records)
+        last = records[-1]
+        return (bucket, samples, last[2], last[3], last[4],
+                sum(r[5] * r[1] for r in records) / samples,
+                sum(r[6] * r[1] for r in records) / samples)
+
+    def record(self, index, status, now=None):
+        """Acrescenta uma amostra do status atual e agrega os buckets que fecharam"""
+        now = now or time.time()
+        agents = status.get('agents', {})
+        try:
+            done_today = float(status.get('tasks', {}).get('done_today') or 0)
+        except (TypeError, ValueError):
+            done_today = 0.0
+        active_agents = len([a for a in agents.values() if a.get('status') == 'active'])
+        self.append(self.tiers[0][0], [(now, 1, index.count('done'), index.active_count,
+                                        done_today, active_agents, len(agents))])
+        for (source, _, _), (target, width, _) in zip(self.tiers, self.tiers[1:]):
+            previous = self.last(target)
+            start = previous[0] + width if previous else 0
+            current = now // width * width
+            buckets = defaultdict(list)
+            for record in self.read(source, since=start):
+                if record[0] < current:
+                    buckets[record[0] // width * width].append(record)
+            if buckets:
+                self.append(target, [self.rollup(bucket, buckets[bucket]) for bucket in sorted(buckets)])
+        for tier, _, limit in self.tiers:
+            self.compact(tier, limit)
+
+    def hourly(self, hours=HISTORY_CHART_HOURS):
+        """(início da hora, tasks concluídas, % de agentes ativos) das últimas `hours` horas"""
+        tier, width, _ = self.tiers[-1]
+        last = self.last(tier)
+        if last is None:
+            return []
+        # Uma hora a mais: o throughput da primeira é a diferença para a anterior
+        records = self.read(tier, since=last[0] - hours * width)
+        points = []
+        for previous, record in zip(records, records[1:]):
+            utilisation = 100 * record[5] / record[6] if record[6] else 0
+            points.append((record[0], max(0, record[2] - previous[2]), utilisation))
+        return points[-hours:]
+
+class OutputWriter:
+    """Grava os arquivos do dashboard, pulando os que não mudaram.
+
+    O hash de cada arquivo escrito fica em .cache/outputs.json; um arquivo com
+    o mesmo conteúdo não é regravado (mtime/ETag ficam iguais para o servidor e
+    o navegador). finish() remove o que a geração anterior produziu e esta não
+    (numa geração parcial, só grava os hashes).
+    """
+
+    def __init__(self, output_dir=None, compress=False, snapshot=None):
+        self.output_dir = Path(output_dir or DASHBOARD)
+        self.compress = compress
+        self.snapshot = snapshot
+        state = load_json(OUTPUTS_FILE)
+        self.hashes = state.get('files', {})
+        self.trees = state.get('trees', {})
+        self.produced = {}
+        self.written = 0
+        self.kept = 0
+
+    def write(self, name, chunks, precompress=True):
+        """Grava `name` (relativo ao diretório de saída) se o conteúdo mudou.
+
+        `chunks` pode ser um gerador (gravado em streaming) ou uma lista já
+        pronta, que é comparada pelo hash antes de abrir um temporário.
+        """
+        path = self.output_dir / name
+        previous = self.hashes.get(name) if path.exists() else None
+        if isinstance(chunks, list) and previous is not None and content_hash(chunks) == previous:
+            if self.snapshot is not None:
+                for _ in self.snapshot.record(name, chunks):
+                    pass
+            self.produced[name] = previous
+            compress = self.compress and precompress
+            if compress != path.with_name(path.name + '.gz').exists():
+                write_precompressed(path, compress)
+            return path
+        chunks = PROFILE.chunks('render', chunks)
+        if self.snapshot is not None:
+            chunks = self.snapshot.record(name, chunks)
+        digest = write_atomic(path, chunks, previous_hash=previous)
+        self.produced[name] = digest
+        compress = self.compress and precompress
+        if digest != previous:
+            self.written += 1
+            PROFILE.count('files_written')
+            PROFILE.count('bytes_written', path.stat().st_size)
+            self.trees.pop(name, None)
+            write_precompressed(path, compress)
+        elif compress != path.with_name(path.name + '.gz').exists():
+            write_precompressed(path, compress)
+        return path
+
+    def keep(self, name):
+        """Mantém um arquivo gravado em uma geração anterior sem renderizá-lo.
+
+        Retorna False se ele não existe mais (aí é preciso gravá-lo de novo).
+        No snapshot entra pelos nós já guardados, sem reler o arquivo.
+        """
+        path = self.output_dir / name
+        if name not in self.hashes or not path.exists():
+            return False
+        self.produced[name] = self.hashes[name]
+        self.kept += 1
+        if self.snapshot is not None:
+            trees = self.trees.get(name)
+            if trees and self.snapshot.has(trees):
+                self.snapshot.files[name] = trees
+            else:
+                for _ in self.snapshot.record(name, read_blocks(path)):
+                    pass
+        if self.compress != path.with_name(path.name + '.gz').exists():
+            write_precompressed(path, self.compress)
+        return True
+
+    def finish(self, prune=True):
+        """Remove arquivos que não foram produzidos nesta geração e salva os hashes.
+
+        Com `prune=False` (geração parcial, como --limit/--window) nada é removido:
+        páginas de arquivo e detalhes de uma geração completa continuam valendo e
+        seguem nos hashes, para a próxima geração completa limpar o que sobrar.
+        """
+        if not prune:
+            self.produced = {**self.hashes, **self.produced}
+        for name in self.hashes.keys() - self.produced.keys():
+            path = self.output_dir / name
+            for stale in (path, path.with_name(path.name + '.gz'), path.with_name(path.name + '.br')):
+                try:
+                    stale.unlink()
+                except FileNotFoundError:
+                    pass
+        trees = {name: self.trees[name] for name in self.produced if name in self.trees}
+        if self.snapshot is not None:
+            trees.update((name, self.snapshot.files[name]) for name in self.produced if name in self.snapshot.files)
+        # Só os nós de arquivos que não mudam mais valem a pena guardar
+        trees = {name: value for name, value in trees.items() if name.startswith('archive-')}
+        write_atomic(OUTPUTS_FILE, [json.dumps({'files': self.produced, 'trees': trees}, sort_keys=True)])
+        self.hashes = self.produced
+        self.trees = trees
+        self.produced = {}
+
+def write_dashboard(index, status, compress=False, snapshot=None, archive=None, fragments=None, history=None):
+    """Gera e salva o dashboard: index.html, data.json, uma página por status (com
+    seu data-<status>.json), o arquivo de tasks done e os detalhes de cada task.
+
+    Tudo é gravado em streaming; arquivos cujo conteúdo não mudou não são
+    regravados e páginas cheias do arquivo não são nem renderizadas. Sem
+    `archive` (ex.: índice parcial do stream_index) não há janela de done nem
+    páginas de arquivo, o estado do arquivo não é tocado e nenhum arquivo de uma
+    geração anterior é removido. Com `fragments`
+    (FragmentCache), só os cards e detalhes de tasks alteradas são renderizados.
+    Com `history` (StatusHistory) o index.html ganha a aba de gráficos.
+    """
+    if archive is not None:
+        archive.update(index)
+    writer = OutputWriter(DASHBOARD, compress, snapshot)
+    with PROFILE.phase('write', exclude='render'):
+        for name, content in ASSETS.items():
+            writer.write(name, [content])
+        output_file = writer.write("index.html", render_page(index, status, archive, fragments, history))
+        writer.write(DATA_FILE, render_data(index, status, archive))
+        for task_status, filename, keys in status_shards(index, archive):
+            source = shard_data_name(filename)
+            writer.write(source, render_shard_data(index, keys))
+            writer.write(filename, render_status_page(index, task_status, keys, archive, fragments, source))
+        for number, keys in enumerate(archive.pages if archive is not None else ()):
+            name = archive.page_name(number)
+            if number in archive.changed or not archive.is_frozen(number) or not writer.keep(name):
+                writer.write(name, render_archive_page(index, number, keys, fragments))
+        roots = {name: info.get('shared') for name, info in status.get('factories', {}).items()}
+        for key, task in index.tasks.items():
+            shared = roots.get(task.get('factory')) or str(SHARED)
+            digest = index.hashes.get(key) if fragments is not None else None
+            if digest is None:
+                details = render_task_details(task, shared)
+            else:
+                details = fragments.get(f"details:{digest}:{shared}", lambda: render_task_details(task, shared))
+            writer.write(f"{DETAILS_DIR}/{detail_name(key)}", [details], precompress=False)
+        writer.finish(prune=archive is not None)
+        if archive is not None:
+            archive.save()
+        if fragments is not None:
+            fragments.save()
+            PROFILE.count('fragments_hit', fragments.hits)
+            PROFILE.count('fragments_rendered', fragments.misses)
+    PROFILE.count('files_kept', writer.kept)
+    PROFILE.count('files_unchanged', len(writer.hashes) - writer.written - writer.kept)
+    return output_file
+
+class SnapshotStore:
+    """Snapshots do dashboard em um armazém endereçado por conteúdo.
+
+    Cada fragmento gerado (estilos, header, card de task, card de agente,
+    detalhes de uma task...) vira um objeto em objects/<hash[:2]>/<resto do
+    hash>, gravado uma única vez. A sequência de hashes de cada arquivo é
+    agrupada em nós ("trees") com fronteiras definidas pelo próprio conteúdo,
+    então alterar ou inserir uma task só cria o nó vizinho; arquivos de um
+    fragmento só apontam direto para ele ("=<hash>"). A lista de arquivos
+    (nome → nós) é agrupada do mesmo jeito, e o manifesto de cada snapshot
+    guarda só esses grupos; manifests/LATEST aponta para o mais recente.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or SNAPSHOTS_DIR)
+        self.files = {}
+        self.written = 0
+
+    def object_path(self, digest):
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+    def put(self, data):
+        """Guarda bytes (se ainda não existem) e retorna o hash"""
+        digest = hashlib.sha256(data).hexdigest()[:SNAPSHOT_HASH_LEN]
+        path = self.object_path(digest)
+        if not path.exists():
+            write_atomic(path, [data])
+            self.written += 1
+        return digest
+
+    def get(self, digest):
+        return self.object_path(digest).read_bytes()
+
+    def has(self, trees):
+        return all(self.object_path(tree.lstrip('=')).exists() for tree in trees)
+
+    def record(self, name, chunks):
+        """Repassa os fragmentos (str ou bytes) de `name` guardando cada um no armazém"""
+        hashes = []
+        for chunk in chunks:
+            hashes.append(self.put(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')))
+            yield chunk
+        self.files[name] = ['=' + hashes[0]] if len(hashes) == 1 else self.build_trees(hashes)
+
+    def build_trees(self, entries):
+        """Agrupa entradas (uma por linha) em nós; a fronteira cai após entradas 'redondas'"""
+        trees = []
+        group = []
+        for entry in entries:
+            group.append(entry)
+            mark = int(hashlib.sha256(entry.encode()).hexdigest()[:8], 16)
+            if mark % SNAPSHOT_TREE_FANOUT == 0 or len(group) >= SNAPSHOT_TREE_FANOUT * 4:
+                trees.append(self.put('\n'.join(group).encode()))
+                group = []
+        if group:
+            trees.append(self.put('\n'.join(group).encode()))
+        return trees
+
+    def commit(self, fingerprint=''):
+        """Grava o manifesto do snapshot e atualiza LATEST; retorna o nome"""
+        name = datetime.now().strftime('%Y%m%dT%H%M%S') + (f"-{fingerprint[:8]}" if fingerprint else '')
+        entries = [f"{filename}\t{' '.join(trees)}" for filename, trees in sorted(self.files.items())]
+        manifest = {'version': SNAPSHOT_MANIFEST_VERSION,
+                    'created': datetime.now().isoformat(timespec='seconds'),
+                    'fingerprint': fingerprint, 'count': len(entries),
+                    'files': self.build_trees(entries)}
+        manifests = self.root / "manifests"
+        write_atomic(manifests / f"{name}.json", [json.dumps(manifest, indent=1, sort_keys=True)])
+        write_atomic(manifests / "LATEST", [name + '\n'])
+        return name
+
+    def names(self):
+        """Snapshots disponíveis, do mais antigo ao mais recente"""
+        manifests = self.root / "manifests"
+        return sorted(p.stem for p in manifests.glob("*.json")) if manifests.exists() else []
+
+    def restore(self, name, output_dir):
+        """Reconstrói os arquivos de um snapshot ('latest' = o mais recente).
+
+        ValueError quando o snapshot não existe ou o manifesto é de um formato
+        desconhecido.
+        """
+        manifests = self.root / "manifests"
+        if name == 'latest':
+            try:
+                name = (manifests / "LATEST").read_text().strip()
+            except FileNotFoundError:
+                raise ValueError(f"nenhum snapshot em {self.root}")
+        try:
+            manifest = json.loads((manifests / f"{name}.json").read_text())
+        except FileNotFoundError:
+            raise ValueError(f"snapshot {name!r} não encontrado em {self.root} (veja --list-snapshots)")
+        restored = []
+        for filename, trees in self.entries(manifest):
+            write_atomic(Path(output_dir) / filename, self.expand(trees))
+            restored.append(filename)
+        return name, restored
+
+    def entries(self, manifest):
+        """(arquivo, nós) de um manifesto em qualquer formato conhecido"""
+        version = manifest.get('version', 1)
+        if version > SNAPSHOT_MANIFEST_VERSION:
+            raise ValueError(f"manifesto na versão {version}; este generate.py lê até a {SNAPSHOT_MANIFEST_VERSION}")
+        files = manifest['files']
+        if isinstance(files, dict):
+            # Versão 1: arquivo → nós direto no manifesto
+            yield from sorted(files.items())
+            return
+        for entry in self.lines(files):
+            filename, trees = entry.split('\t')
+            yield filename, trees.split()
+
+    def lines(self, trees):
+        for tree in trees:
+            yield from self.get(tree).decode().split('\n')
+
+    def expand(self, trees):
+        for tree in trees:
+            if tree.startswith('='):
+                yield self.get(tree[1:])
+                continue
+            for digest in self.lines([tree]):
+                yield self.get(digest)
+
+# Modo watch: inotify no Linux, polling como fallback
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+INOTIFY_EVENT = struct.Struct('iIII')
+
+DEBOUNCE_SECONDS = 0.2
+MAX_LATENCY_SECONDS = 0.8
+POLL_INTERVAL_SECONDS = 1.0
+
+class FileWatcher:
+    """Observa diretórios e reporta os arquivos alterados.
+
+    Usa inotify (via ctypes, sem dependências) quando disponível e cai para
+    polling por mtime/tamanho em outros sistemas. `wait()` retorna um set de
+    Paths alterados, ou None quando o kernel perdeu eventos (releia tudo).
+    """
+
+    def __init__(self, directories):
+        self.directories = [Path(d) for d in directories]
+        self.fd = None
+        self.wds = {}
+        self.snapshot = {}
+        libc = self._libc()
+        if libc is not None:
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self.fd = fd
+                for directory in self.directories:
+                    wd = libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+                    if wd >= 0:
+                        self.wds[wd] = directory
+        if self.fd is None:
+            self.snapshot = self._stat_all()
+
+    @staticmethod
+    def _libc():
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            libc.inotify_init1
+            return libc
+        except (OSError, AttributeError):
+            return None
+
+    @property
+    def mode(self):
+        return 'inotify' if self.fd is not None else 'polling'
+
+    def wait(self, timeout=None):
+        if self.fd is None:
+            return self._poll(timeout)
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if wd in self.wds and name:
+                changed.add(self.wds[wd] / os.fsdecode(name))
+        return changed
+
+    def _stat_all(self):
+        snapshot = {}
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        snapshot[Path(entry.path)] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return snapshot
+
+    def _poll(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._stat_all()
+            changed = {path for path in current.keys() | self.snapshot.keys()
+                       if current.get(path) != self.snapshot.get(path)}
+            self.snapshot = current
+            if changed:
+                return changed
+            remaining = POLL_INTERVAL_SECONDS if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(POLL_INTERVAL_SECONDS, remaining))
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+def collect_changes(watcher, timeout=None):
+    """Espera uma mudança e agrupa a rajada de escritas que vier em seguida.
+
+    Para quando os arquivos ficam quietos por DEBOUNCE_SECONDS ou quando a
+    primeira mudança já tem MAX_LATENCY_SECONDS, o que mantém a regeneração
+    abaixo de 1 segundo mesmo com agentes escrevendo sem parar.
+    Retorna set() se nada mudou dentro de `timeout`.
+    """
+    changed = watcher.wait(timeout)
+    if not changed and changed is not None:
+        return changed
+    deadline = time.monotonic() + MAX_LATENCY_SECONDS
+    while changed is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        more = watcher.wait(min(DEBOUNCE_SECONDS, remaining))
+        if more is None:
+            return None
+        if not more:
+            break
+        changed |= more
+    return changed
+
+def window_options(archive):
+    """Opções da janela de done para o fingerprint (com dias, muda a cada dia)"""
+    day = datetime.now().strftime('%Y-%m-%d') if archive.days else ''
+    return f"done={archive.days}d/{archive.limit}:{day}"
+
+def watch(compress=False, threads=PARSE_THREADS, processes=PARSE_PROCESSES, archive=None, profile=None):
+    """Regenera o dashboard sempre que shared/tasks/ ou shared/status.json mudam"""
+    tasks_dir = SHARED / "tasks"
+    status_file = SHARED / "status.json"
+
+    manifest = load_manifest()
+    if scan_tasks(tasks_dir, manifest, threads=threads, processes=processes):
+        save_manifest(manifest)
+    report_errors(manifest)
+    index = TaskIndex.from_manifest(manifest)
+    status = load_status()
+    archive = archive or DoneArchive()
+    fragments = FragmentCache()
+    history = StatusHistory()
+    history.record(index, status)
+    fingerprint = inputs_fingerprint(manifest, status, f"compress={compress};{window_options(archive)}")
+    output_file = write_dashboard(index, status, compress, archive=archive, fragments=fragments, history=history)
+    save_fingerprint(fingerprint)
+
+    watcher = FileWatcher([tasks_dir, SHARED])
+    print(f"👀 Observando {SHARED} ({watcher.mode}) — Ctrl+C para parar")
+    print(f"   Dashboard: {output_file}")
+    try:
+        while True:
+            # Com janela por dias, acorda de hora em hora para a virada do dia
+            changed = collect_changes(watcher, timeout=3600 if archive.days else None)
+            started = time.monotonic()
+            PROFILE.reset()
+            timed_out = changed is not None and not changed
+            if changed is None:
+                task_names = None
+                status_changed = True
+            else:
+                task_names = {p.name for p in changed if p.parent == tasks_dir and is_task_file(p.name)}
+                status_changed = status_file in changed
+                if not task_names and not status_changed and not timed_out:
+                    continue
+
+            # Só relê o que mudou: tasks alteradas e/ou status.json
+            changes = []
+            if task_names is None or task_names:
+                changes = scan_tasks(tasks_dir, manifest, task_names, threads, processes)
+                if changes:
+                    with PROFILE.phase('manifest'):
+                        save_manifest(manifest)
+                    report_errors(manifest, [name for name, _, _ in changes])
+                    with PROFILE.phase('index'):
+                        index.apply(changes, manifest)
+            if status_changed:
+                with PROFILE.phase('discover'):
+                    status = load_status()
+            if not changes and not status_changed and not timed_out:
+                continue
+            with PROFILE.phase('history'):
+                history.record(index, status)
+            with PROFILE.phase('fingerprint'):
+                new_fingerprint = inputs_fingerprint(manifest, status, f"compress={compress};{window_options(archive)}")
+            if new_fingerprint == fingerprint:
+                continue
+
+            write_dashboard(index, status, compress, archive=archive, fragments=fragments, history=history)
+            fingerprint = new_fingerprint
+            save_fingerprint(fingerprint)
+            elapsed = time.monotonic() - started
+            parts = []
+            if changes:
+                parts.append(f"{len(changes)} task(s)")
+            if status_changed:
+                parts.append("status.json")
+            if not parts:
+                parts.append("janela de done")
+            print(f"🔄 [{datetime.now().strftime('%H:%M:%S')}] {' + '.join(parts)} "
+                  f"→ dashboard regenerado em {elapsed:.2f}s")
+            if profile:
+                PROFILE.count('tasks', len(index))
+                PROFILE.emit(profile, mode='watch', changed=len(changes))
+    except KeyboardInterrupt:
+        print("\n👋 Watch encerrado")
+    finally:
+        watcher.close()
 
 def main():
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Gera o dashboard da Facilita Factory")
+    parser.add_argument('--watch', action='store_true',
+                        help="fica rodando e regenera a cada mudança em shared/ (inotify)")
+    parser.add_argument('--force', action='store_true',
+                        help="regenera mesmo se tasks e status não mudaram")
+    parser.add_argument('--compress', action='store_true',
+                        help="grava também index.html.gz (e .br com o pacote brotli)")
+    parser.add_argument('--threads', type=int, default=PARSE_THREADS,
+                        help=f"threads de leitura das tasks (padrão: {PARSE_THREADS})")
+    parser.add_argument('--processes', type=int, default=PARSE_PROCESSES,
+                        help="processos para o parse do JSON (padrão: 0, parse nas threads)")
+    parser.add_argument('--json', choices=['auto', 'json', 'orjson'], default='auto',
+                        help="decoder JSON (auto: orjson se instalado)")
+    parser.add_argument('--done-days', type=int, default=DONE_WINDOW_DAYS,
+                        help=f"dias de tasks done na página principal (padrão: {DONE_WINDOW_DAYS}, 0 = sem limite)")
+    parser.add_argument('--done-limit', type=int, default=DONE_WINDOW_TASKS,
+                        help=f"máximo de tasks done na página principal (padrão: {DONE_WINDOW_TASKS}, 0 = sem limite)")
+    parser.add_argument('--limit', type=int, metavar='N',
+                        help="modo streaming: lê as tasks uma a uma e guarda só as N mais recentes "
+                             "(e as N mais recentes de cada status); memória proporcional a N")
+    parser.add_argument('--window', type=float, metavar='DIAS',
+                        help="modo streaming: só tasks com atividade nos últimos DIAS dias")
+    parser.add_argument('--factory', action='append', default=[], metavar='NOME=CAMINHO',
+                        help="junta mais uma factory no dashboard (repetível; use no lugar do FACTORY_ROOT)")
+    parser.add_argument('--factories', type=Path, metavar='ARQUIVO',
+                        help='factories de um arquivo JSON {"nome": "/caminho/da/factory", ...}')
+    parser.add_argument('--factory-timeout', type=float, default=FACTORY_TIMEOUT, metavar='SEGUNDOS',
+                        help=f"com várias factories, espera por cada uma até SEGUNDOS; depois usa a última "
+                             f"leitura boa (padrão: {FACTORY_TIMEOUT})")
+    parser.add_argument('--profile', nargs='?', const='-', metavar='ARQUIVO',
+                        help="tempos por fase e contadores em JSON (no stdout, ou uma linha por geração em ARQUIVO)")
+    parser.add_argument('--snapshot', action='store_true',
+                        help="guarda a geração no armazém de snapshots (deduplicado por conteúdo)")
+    parser.add_argument('--restore', metavar='NOME',
+                        help="reconstrói um snapshot ('latest' = o mais recente) e sai")
+    parser.add_argument('--list-snapshots', action='store_true', help="lista os snapshots e sai")
+    parser.add_argument('--store', default=SNAPSHOTS_DIR, type=Path,
+                        help=f"diretório do armazém de snapshots (padrão: {SNAPSHOTS_DIR})")
+    parser.add_argument('--output-dir', default=DASHBOARD, type=Path,
+                        help=f"destino do --restore (padrão: {DASHBOARD})")
+    args = parser.parse_args()
+
+    if args.list_snapshots:
+        for name in SnapshotStore(args.store).names():
+            print(name)
+        return
+    if args.restore:
+        try:
+            name, files = SnapshotStore(args.store).restore(args.restore, args.output_dir)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"📸 Snapshot {name} restaurado em {args.output_dir}: {len(files)} arquivo(s)")
+        return
+
+    if args.json == 'orjson' and not orjson:
+        parser.error("orjson não está instalado (pip install orjson)")
+    set_json_backend('json' if args.json == 'json' else JSON_BACKEND)
+
+    streaming = args.limit is not None or args.window is not None
+    if streaming and args.watch:
+        parser.error("--limit/--window não funcionam com --watch")
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit deve ser pelo menos 1")
+    try:
+        factories = parse_factories(args.factory, args.factories)
+    except ValueError as e:
+        parser.error(str(e))
+    if factories and (args.watch or streaming):
+        parser.error("--watch/--limit/--window funcionam só com uma factory")
+
+    PROFILE.enabled = bool(args.profile)
+    archive = DoneArchive(days=args.done_days, limit=args.done_limit)
+    if args.watch:
+        watch(args.compress, args.threads, args.processes, archive, args.profile)
+        return
+
     print("🏭 Gerando dashboard...")
     
     # Carregar dados
-    tasks = load_tasks()
-    status = load_status()
+    if streaming:
+        # Uma passada pelos arquivos, guardando só o que vai ser renderizado (sem
+        # manifesto nem arquivo de done, que dependem de todas as tasks em memória)
+        since = time.time() - args.window * 86400 if args.window is not None else None
+        hasher = fingerprint_hasher()
+        index = stream_index(args.limit, since, fingerprint=hasher)
+        archive = None
+        options = f"limit={args.limit};window={args.window}:{datetime.now().strftime('%Y-%m-%d')}"
+    elif factories:
+        # Várias factories, lidas em paralelo e juntadas em um manifesto só; a
+        # que falhar (ou demorar) entra com a última leitura boa
+        loaded = load_factories([Factory(name, root) for name, root in factories.items()],
+                                args.threads, args.processes, args.factory_timeout)
+        manifest, status = merge_factories(loaded)
+        with PROFILE.phase('index'):
+            index = TaskIndex.from_manifest(manifest)
+        options = f"{window_options(archive)};factories={','.join(factories)}"
+    else:
+        with PROFILE.phase('manifest'):
+            manifest = load_manifest()
+        if scan_tasks(SHARED / "tasks", manifest, threads=args.threads, processes=args.processes):
+            with PROFILE.phase('manifest'):
+                save_manifest(manifest)
+        with PROFILE.phase('index'):
+            index = TaskIndex.from_manifest(manifest)
+        options = window_options(archive)
+    if not factories:
+        with PROFILE.phase('discover'):
+            status = load_status()
+    PROFILE.count('tasks', len(index))
+    PROFILE.count('agents', len(status.get('agents', {})))
     
-    print(f"   Tasks encontradas: {len(tasks)}")
+    print(f"   Tasks encontradas: {len(index)}")
+    if streaming:
+        print(f"   Tasks renderizadas: {len(index.tasks)}")
+    else:
+        errors = report_errors(manifest)
+        if errors:
+            print(f"   Arquivos de task inválidos: {errors}")
     print(f"   Agentes: {len(status.get('agents', {}))}")
+    for name, total, _active, _done, _active_agents, _agents, error in factory_stats(index, status):
+        print(f"   🏭 {name}: {total} tasks" + (f" — ⚠️  {error}, usando a última leitura" if error else ""))
     
-    # Gerar HTML
-    html = generate_html(tasks, status)
+    # Toda execução vira uma amostra do histórico, mas o histórico fica fora do
+    # fingerprint: os gráficos são republicados junto com a próxima mudança de
+    # tasks/status, e uma hora que fecha sozinha não regenera nem publica nada
+    with PROFILE.phase('history'):
+        history = StatusHistory()
+        history.record(index, status)
     
-    # Salvar
+    # Nada mudou desde a última geração: não escreve nada
+    with PROFILE.phase('fingerprint'):
+        options = f"compress={args.compress};{options}"
+        if streaming:
+            fingerprint = finish_fingerprint(hasher, status, options)
+        else:
+            fingerprint = inputs_fingerprint(manifest, status, options)
     output_file = DASHBOARD / "index.html"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html)
+    if not args.force and output_file.exists() and fingerprint == read_fingerprint():
+        print("⏭️  Sem mudanças desde a última geração, nada a fazer")
+        if args.profile:
+            PROFILE.emit(args.profile, unchanged=True)
+        sys.exit(EXIT_UNCHANGED)
+    
+    snapshot = SnapshotStore(args.store) if args.snapshot else None
+    # No modo streaming o cache (que cresce com o histórico) fica de fora
+    fragments = None
+    if not streaming:
+        with PROFILE.phase('fragments'):
+            fragments = FragmentCache()
+    output_file = write_dashboard(index, status, args.compress, snapshot, archive, fragments, history)
+    save_fingerprint(fingerprint)
+    if snapshot is not None:
+        with PROFILE.phase('snapshot'):
+            name = snapshot.commit(fingerprint)
+        PROFILE.count('snapshot_objects', snapshot.written)
+        print(f"📸 Snapshot {name} ({snapshot.written} objeto(s) novo(s))")
     
     print(f"✅ Dashboard gerado: {output_file}")
     print(f"   Abra no navegador: file://{output_file}")
+    if args.profile:
+        PROFILE.emit(args.profile, unchanged=False)
 
 if __name__ == '__main__':
     main()
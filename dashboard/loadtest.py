@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Facilita Factory Server Load Test
+Simula N telas (monitor.html e index.html) ligadas ao /events de um server.py local
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import bench
+import generate
+
+LOADTEST_DIR = Path(__file__).resolve().parent
+
+# Padrões de acesso reais: as duas páginas ficam no /events e buscam os dados a cada
+# mudança (monitor.html: /api/agents quando o status muda; index.html: data.json a
+# cada change). Sem /events, fazem polling (10s e 30s) e reabrem o stream com backoff
+MONITOR_INTERVAL = 10.0
+DASHBOARD_INTERVAL = 30.0
+EVENTS_RETRY = 5.0
+EVENTS_MAX_RETRY = 300.0
+SSE_RETRY = 3.0  # retry: do server.py (SSE_RETRY_MS): reconexão depois de uma queda
+REQUEST_TIMEOUT = 10.0
+ACCEPT_ENCODING = "gzip, deflate, br"
+
+class Stats:
+    """Latências e contadores por tipo de request"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.bytes = 0
+        self.reconnects = 0
+
+    def record(self, kind, status, latency, size):
+        self.latencies[kind].append(latency)
+        self.statuses[kind][status] += 1
+        self.bytes += size
+
+    def error(self, kind, reason):
+        self.errors[f"{kind}: {reason}"] += 1
+        self.statuses[kind]['erro'] += 1
+
+def percentile(values, p):
+    """Percentil por posição (nearest rank) de uma lista ordenada"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))]
+
+class Connection:
+    """Conexão HTTP/1.1 keep-alive de um cliente, com cache de ETag/Last-Modified como o navegador"""
+
+    def __init__(self, host, port, stats):
+        self.host = host
+        self.port = port
+        self.stats = stats
+        self.reader = None
+        self.writer = None
+        self.validators = {}
+
+    async def get(self, path):
+        """GET condicional; reconecta uma vez se o servidor fechou a conexão ociosa"""
+        for attempt in range(2):
+            reused = self.writer is not None
+            if not reused:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                return await self._exchange(path)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if not reused or attempt:
+                    raise
+                self.stats.reconnects += 1
+
+    async def _exchange(self, path):
+        headers = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                   f"Accept-Encoding: {ACCEPT_ENCODING}", "Cache-Control: max-age=0"]
+        etag, modified = self.validators.get(path, (None, None))
+        if etag:
+            headers.append(f"If-None-Match: {etag}")
+        if modified:
+            headers.append(f"If-Modified-Since: {modified}")
+        self.writer.write(("\r\n".join(headers) + "\r\n\r\n").encode())
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b"\r\n")
+        if not status_line.strip():
+            raise asyncio.IncompleteReadError(status_line, None)
+        status = int(status_line.split()[1])
+        response = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response[name.strip().lower()] = value.strip()
+        size = int(response.get('content-length', 0))
+        if size:
+            await self.reader.readexactly(size)
+        if status == 200:
+            self.validators[path] = (response.get('etag'), response.get('last-modified'))
+        if response.get('connection', '').lower() == 'close':
+            self.close()
+        return status, size
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+async def fetch(connection, stats, path, scheduled):
+    """Um GET contado a partir de `scheduled` (sem coordinated omission: um servidor
+    lento também aparece no atraso dos polls seguintes)"""
+    loop = asyncio.get_running_loop()
+    try:
+        status, size = await asyncio.wait_for(connection.get(path), REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        connection.close()
+        stats.error(path, 'timeout')
+        return
+    except (OSError, asyncio.IncompleteReadError) as e:
+        connection.close()
+        stats.error(path, type(e).__name__)
+        return
+    if status >= 400:
+        stats.error(path, f"HTTP {status}")
+    else:
+        stats.record(path, status, loop.time() - scheduled, size)
+
+async def open_events(host, port):
+    """Abre o /events (em uma conexão própria, como o EventSource) e lê o handshake"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"GET /events HTTP/1.1\r\nHost: {host}:{port}\r\n"
+                     f"Accept: text/event-stream\r\n\r\n".encode())
+        await writer.drain()
+        status = int((await reader.readuntil(b"\r\n")).split()[1])
+        while await reader.readuntil(b"\r\n") != b"\r\n":
+            pass
+        if status != 200:
+            raise ConnectionError(f"HTTP {status}")
+    except BaseException:
+        writer.close()
+        raise
+    return reader, writer
+
+async def read_event(reader):
+    """Próximo evento SSE (nome, dados); blocos só com retry/id e comentários são pulados"""
+    name, data = None, []
+    while True:
+        line = (await reader.readuntil(b"\n")).decode().rstrip("\r\n")
+        if not line:
+            if name or data:
+                return name or 'message', "\n".join(data)
+            continue
+        field, _, value = line.partition(':')
+        value = value[1:] if value.startswith(' ') else value
+        if field == 'event':
+            name = value
+        elif field == 'data':
+            data.append(value)
+
+async def run_screen(pages, data_path, wants, interval, speedup, host, port, stats, deadline, rng):
+    """Uma tela: carrega `pages` e `data_path`, abre o /events e rebusca `data_path`
+    a cada evento em que wants(evento) é verdadeiro. Com o /events fora do ar, faz
+    polling a cada `interval` e tenta reabrir com backoff (5s dobrando até 5min,
+    acelerados por `speedup`), como o monitor.html e o index.html.
+    """
+    loop = asyncio.get_running_loop()
+    connection = Connection(host, port, stats)
+    await asyncio.sleep(rng.uniform(0, interval))
+    try:
+        for path in pages:
+            await fetch(connection, stats, path, loop.time())
+        delay = EVENTS_RETRY / speedup
+        while loop.time() < deadline:
+            opened = loop.time()
+            try:
+                reader, writer = await asyncio.wait_for(open_events(host, port), REQUEST_TIMEOUT)
+            except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+                stats.error('/events', str(e) or type(e).__name__)
+                # Polling até a próxima tentativa
+                reopen = min(deadline, loop.time() + delay)
+                delay = min(delay * 2, EVENTS_MAX_RETRY / speedup)
+                scheduled = loop.time()
+                while scheduled < reopen:
+                    await fetch(connection, stats, data_path, scheduled)
+                    scheduled += interval
+                    await asyncio.sleep(max(0.0, min(scheduled, reopen) - loop.time()))
+                continue
+            stats.record('/events', 200, loop.time() - opened, 0)
+            delay = EVENTS_RETRY / speedup
+            try:
+                # Conectou: busca o estado atual, depois só a cada mudança
+                await fetch(connection, stats, data_path, loop.time())
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    name, data = await asyncio.wait_for(read_event(reader), remaining)
+                    if name == 'change' and wants(json.loads(data)):
+                        await fetch(connection, stats, data_path, loop.time())
+            except asyncio.TimeoutError:
+                break
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                stats.error('/events', 'desconectou')
+                stats.reconnects += 1
+                await asyncio.sleep(SSE_RETRY / speedup)
+            finally:
+                writer.close()
+    finally:
+        connection.close()
+
+async def mutate_status(status_file, interval, deadline):
+    """Reescreve o status.json periodicamente, como os agentes fazem"""
+    loop = asyncio.get_running_loop()
+    while loop.time() + interval < deadline:
+        await asyncio.sleep(interval)
+        status = generate.load_json(status_file)
+        status['lastUpdate'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        generate.write_atomic(status_file, [json.dumps(status, indent=2)])
+
+async def run_load(args, host, port, status_file):
+    stats = Stats()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + args.duration
+    rng = random.Random(args.seed)
+    monitors = round(args.clients * args.monitor_share)
+    clients = []
+    for i in range(args.clients):
+        if i < monitors:
+            # monitor.html: /api/agents só quando o status muda
+            clients.append(run_screen(['/dashboard/monitor.html'], '/api/agents', lambda event: event.get('status'),
+                                      MONITOR_INTERVAL / args.speedup, args.speedup, host, port, stats, deadline, rng))
+        else:
+            # Página e estáticos com hash só na primeira carga (depois o navegador usa o
+            # cache immutable); cada mudança só baixa o data.json
+            clients.append(run_screen(['/dashboard/index.html', f'/dashboard/{generate.CSS_FILE}',
+                                       f'/dashboard/{generate.JS_FILE}'], f'/dashboard/{generate.DATA_FILE}',
+                                      lambda event: True, DASHBOARD_INTERVAL / args.speedup, args.speedup,
+                                      host, port, stats, deadline, rng))
+    if status_file is not None and args.status_interval:
+        clients.append(mutate_status(status_file, args.status_interval / args.speedup, deadline))
+    await asyncio.gather(*clients)
+    return stats, loop.time() - started
+
+def report(stats, elapsed, args):
+    """Imprime o resumo e retorna o dicionário de resultados"""
+    all_latencies = sorted(l for values in stats.latencies.values() for l in values)
+    requests = sum(sum(c.values()) for c in stats.statuses.values())
+    errors = sum(stats.errors.values())
+    results = {
+        'clients': args.clients, 'duration': round(elapsed, 2), 'speedup': args.speedup,
+        'requests': requests, 'throughput': round(requests / elapsed, 1) if elapsed else 0,
+        'errors': errors, 'error_rate': round(errors / requests, 4) if requests else 0,
+        'reconnects': stats.reconnects, 'bytes': stats.bytes,
+        'paths': {},
+    }
+    print(f"\n📊 {args.clients} clientes • {elapsed:.1f}s"
+          + (f" • tempo acelerado {args.speedup:g}x" if args.speedup != 1 else ""))
+    print(f"   {'path':<28}{'reqs':>7}{'200':>7}{'304':>7}{'erros':>7}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for path in sorted(stats.statuses):
+        latencies = sorted(stats.latencies[path])
+        counts = stats.statuses[path]
+        summary = {'requests': sum(counts.values()),
+                   'status': {str(k): v for k, v in counts.items()},
+                   'p50': percentile(latencies, 50), 'p95': percentile(latencies, 95),
+                   'p99': percentile(latencies, 99), 'max': latencies[-1] if latencies else 0}
+        results['paths'][path] = summary
+        print(f"   {path:<28}{summary['requests']:>7}{counts[200]:>7}{counts[304]:>7}{counts['erro']:>7}"
+              f"{summary['p50'] * 1000:>7.1f}ms{summary['p95'] * 1000:>7.1f}ms{summary['p99'] * 1000:>7.1f}ms")
+    for name, p in (('p50', 50), ('p95', 95), ('p99', 99)):
+        results[name] = percentile(all_latencies, p)
+    print(f"\n   Throughput: {results['throughput']} req/s • {stats.bytes / elapsed / 1024:.1f} KB/s recebidos")
+    print(f"   Latência: p50 {results['p50'] * 1000:.1f}ms • p95 {results['p95'] * 1000:.1f}ms"
+          f" • p99 {results['p99'] * 1000:.1f}ms")
+    print(f"   Erros: {errors} ({results['error_rate']:.2%}) • reconexões: {stats.reconnects}")
+    for reason, count in stats.errors.most_common(5):
+        print(f"      {count}× {reason}")
+    return results
+
+def prepare_factory(root, tasks):
+    """Factory sintética com dashboard gerado e o monitor.html, no layout servido pelo server.py"""
+    bench.synthesize(root, tasks)
+    generate.set_paths(root, root / "dashboard")
+    manifest = generate.load_manifest()
+    generate.scan_tasks(generate.SHARED / "tasks", manifest)
+    generate.save_manifest(manifest)
+    generate.write_dashboard(generate.TaskIndex.from_manifest(manifest), generate.load_status(),
+                             archive=generate.DoneArchive())
+    shutil.copy(LOADTEST_DIR / "monitor.html", root / "dashboard" / "monitor.html")
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(directory, port, workers):
+    """Sobe o server.py e espera a porta aceitar conexões"""
+    process = subprocess.Popen(
+        [sys.executable, str(LOADTEST_DIR / "server.py"), '--bind', '127.0.0.1', '--port', str(port),
+         '--directory', str(directory), '--workers', str(workers)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"❌ server.py saiu com código {process.returncode}:\n{process.stderr.read().decode()}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    sys.exit("❌ server.py não abriu a porta em 15s")
+
+def raise_fd_limit(clients):
+    """Cada cliente mantém duas conexões (dados e /events); sobe o limite de descritores se der"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, max(soft, clients * 3 + 256))
+    if wanted > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do server.py com telas ligadas ao /events")
+    parser.add_argument('--clients', type=int, default=100, help="telas simuladas (padrão: 100)")
+    parser.add_argument('--monitor-share', type=float, default=0.8,
+                        help="fração de telas com monitor.html; o resto usa o index.html (padrão: 0.8)")
+    parser.add_argument('--duration', type=float, default=60, help="segundos de teste (padrão: 60)")
+    parser.add_argument('--speedup', type=float, default=1,
+                        help="acelera os intervalos de polling (10 = poll a cada 1s/3s) para testes curtos")
+    parser.add_argument('--status-interval', type=float, default=10,
+                        help="a cada quantos segundos o status.json muda (padrão: 10, 0 = nunca)")
+    parser.add_argument('--tasks', type=int, default=1000, help="tasks da factory sintética (padrão: 1000)")
+    parser.add_argument('--workers', type=int, default=64, help="--workers do server.py (padrão: 64)")
+    parser.add_argument('--url', help="testa um servidor já rodando (ex.: http://localhost:8080) em vez de subir um")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', type=Path, help="grava os resultados neste arquivo")
+    parser.add_argument('--max-error-rate', type=float, default=0.01,
+                        help="sai com 1 se a taxa de erros passar disso (padrão: 1%%)")
+    parser.add_argument('--max-p99', type=float, help="sai com 1 se o p99 (segundos) passar disso")
+    args = parser.parse_args()
+
+    raise_fd_limit(args.clients)
+    root = server = None
+    status_file = None
+    try:
+        if args.url:
+            host, _, port = args.url.split('://')[-1].rstrip('/').partition(':')
+            port = int(port or 80)
+        else:
+            root = Path(tempfile.mkdtemp(prefix="loadtest-"))
+            prepare_factory(root, args.tasks)
+            status_file = root / "shared" / "status.json"
+            host, port = '127.0.0.1', free_port()
+            server = start_server(root, port, args.workers)
+            print(f"🖥️  server.py em http://{host}:{port} ({args.workers} workers, {args.tasks} tasks)")
+        stats, elapsed = asyncio.run(run_load(args, host, port, status_file))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=15)
+        if root is not None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    results = report(stats, elapsed, args)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    failed = []
+    if results['error_rate'] > args.max_error_rate:
+        failed.append(f"taxa de erros {results['error_rate']:.2%} > {args.max_error_rate:.2%}")
+    if args.max_p99 is not None and results['p99'] > args.max_p99:
+        failed.append(f"p99 {results['p99'] * 1000:.0f}ms > {args.max_p99 * 1000:.0f}ms")
+    if failed:
+        print(f"\n❌ {'; '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
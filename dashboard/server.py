@@ -3,24 +3,1202 @@
 Servidor HTTP simples para o Dashboard da Facilita Factory
 """
 
+import argparse
+import base64
+import bisect
+import email.utils
+import gzip
+import hashlib
 import http.server
-import socketserver
+import io
+import json
 import os
+import re
+import selectors
+import signal
 import socket
+import threading
+import time
+import urllib.parse
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+from pathlib import Path
+
+import generate
 
 PORT = 8080
+BIND = "0.0.0.0"
 DIRECTORY = "/home/ubuntu/facilita-factory"
+WORKERS = 64
+KEEPALIVE_TIMEOUT = 15
+
+# Variantes pré-comprimidas geradas pelo generate.py --compress, em ordem de preferência
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+MIN_COMPRESS_SIZE = 1024
+GZIP_CACHE_BYTES = 32 * 1024 * 1024
+
+# Cache em memória dos arquivos servidos (index.html, data.json, status.json...):
+# N monitores fazendo poll do mesmo arquivo custam um stat cada, não uma leitura.
+# Arquivos maiores que FILE_CACHE_MAX_FILE não entram e vão por sendfile (zero-copy)
+FILE_CACHE_BYTES = 64 * 1024 * 1024
+FILE_CACHE_MAX_FILE = 2 * 1024 * 1024
+
+# Estáticos com hash do conteúdo no nome (dashboard.<hash>.css/.js): nunca mudam,
+# então o navegador pode guardar por um ano sem revalidar
+HASHED_ASSET = re.compile(r'\.[0-9a-f]{8,}\.(css|js)$')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+# API JSON (/api/tasks, /api/agents, /api/changes)
+API_PATHS = ('/api/tasks', '/api/agents', '/api/changes')
+API_SORT_FIELDS = ('createdAt', 'updatedAt')
+API_FILTERS = {'status': 'status', 'priority': 'priority', 'assignee': 'assignedTo', 'project': 'project',
+               'factory': 'factory'}
+API_DEFAULT_LIMIT = 50
+API_MAX_LIMIT = 500
+# Log de mudanças do /api/changes: tasks e agentes alterados em cada revisão, até
+# CHANGE_LOG_MAX_ITEMS no total; clientes mais atrasados que isso recebem resync
+CHANGE_LOG_MAX_ITEMS = 10000
+
+# Várias factories (--factory/--factories, como no generate.py): a raiz de cada
+# uma é servida em /factories/<nome>/ e a API junta as tasks de todas
+FACTORY_MOUNT = "factories"
+
+# Server-Sent Events (/events)
+SSE_HEARTBEAT = 15
+SSE_SEND_TIMEOUT = 2
+SSE_RETRY_MS = 3000
+SSE_MAX_CLIENTS = 1000
+SSE_MAX_TASK_IDS = 50
+
+# Métricas Prometheus (/metrics)
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_MAX_PATHS = 200
+# Paths de uma task (detalhes, arquivo da task, páginas do arquivo de done) viram um
+# label só; sem isso um crawler dos detalhes esgota o limite antes da API aparecer
+METRICS_PATH_GROUPS = [
+    (re.compile(r'/details/[^/]+$'), '/details/*'),
+    (re.compile(r'/tasks/[^/]+$'), '/tasks/*'),
+    (re.compile(r'/archive-[^/]+$'), '/archive-*'),
+]
+
+def is_compressible(ctype):
+    return ctype.startswith(COMPRESSIBLE_TYPES)
+
+def parse_accept_encoding(header):
+    """Converte 'gzip, br;q=0.8' em {'gzip': 1.0, 'br': 0.8}"""
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+def accepts(accepted, encoding):
+    return accepted.get(encoding, accepted.get('*', 0)) > 0
+
+class GzipCache:
+    """Cache LRU, limitado em bytes, dos arquivos comprimidos sob demanda"""
+
+    def __init__(self, max_bytes=GZIP_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, st, f):
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and entry[0] == stamp:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        body = gzip.compress(f.read(), compresslevel=6, mtime=0)
+        if len(body) <= self.max_bytes:
+            with self.lock:
+                old = self.entries.pop(path, None)
+                if old:
+                    self.size -= len(old[1])
+                self.entries[path] = (stamp, body)
+                self.size += len(body)
+                while self.size > self.max_bytes:
+                    _, (_, evicted) = self.entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return body
+
+class FileCache:
+    """Cache LRU, limitado em bytes, do conteúdo dos arquivos servidos.
+
+    Cada entrada guarda o (mtime, tamanho, inode) com que foi lida e só vale
+    para o mesmo stat do request (o generate.py troca os arquivos por rename,
+    então o inode muda junto); o ChangeHub também descarta na hora o que o
+    inotify viu mudar em shared/. Requests simultâneos de um arquivo que não
+    está no cache esperam uma leitura só (single-flight).
+    """
+
+    def __init__(self, max_bytes=FILE_CACHE_BYTES, max_file=FILE_CACHE_MAX_FILE):
+        self.max_bytes = max_bytes
+        self.max_file = max_file
+        self.entries = OrderedDict()
+        self.loading = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, st):
+        """Conteúdo de `path` no estado `st` (o stat que o handler acabou de fazer)"""
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and entry[0] == stamp:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            flight = self.loading.get(path)
+            leader = flight is None or flight['stamp'] != stamp
+            if leader:
+                flight = {'stamp': stamp, 'done': threading.Event(), 'body': None, 'error': None}
+                self.loading[path] = flight
+                self.misses += 1
+            else:
+                self.waits += 1
+        if not leader:
+            flight['done'].wait()
+            if flight['error'] is not None:
+                raise flight['error']
+            return flight['body']
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+                current = os.fstat(f.fileno())
+            flight['body'] = body
+        except OSError as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self.lock:
+                if self.loading.get(path) is flight:
+                    del self.loading[path]
+            flight['done'].set()
+        # Arquivo trocado entre o stat e a leitura: serve, mas não guarda
+        if (current.st_mtime_ns, current.st_size, current.st_ino) == stamp and len(body) <= self.max_file:
+            self.put(path, stamp, body)
+        return body
+
+    def put(self, path, stamp, body):
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old:
+                self.size -= len(old[1])
+            self.entries[path] = (stamp, body)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def invalidate(self, directory, names=None):
+        """Descarta os arquivos `names` de `directory` (com names None, tudo abaixo dele)"""
+        directory = os.path.abspath(directory)
+        with self.lock:
+            if names is None:
+                prefix = directory + os.sep
+                paths = [path for path in self.entries if path.startswith(prefix)]
+            else:
+                paths = [os.path.join(directory, name) for name in names]
+            for path in paths:
+                old = self.entries.pop(path, None)
+                if old:
+                    self.size -= len(old[1])
+
+class MemoryBody:
+    """Corpo de resposta já em memória (FileCache ou gzip na hora), enviado num write só"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def close(self):
+        pass
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Metrics:
+    """Contadores e histogramas de latência por path, no formato texto do Prometheus.
+
+    Paths por task são agrupados (METRICS_PATH_GROUPS) e os endpoints do
+    servidor (API, /events, /metrics) sempre têm o seu label. O número de
+    outros paths distintos é limitado (METRICS_MAX_PATHS); os que passam do
+    limite, e os que deram erro sem nunca terem respondido OK, entram como
+    path="other".
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.bytes = Counter()
+        self.buckets = {}
+        self.sums = Counter()
+        self.paths = set()
+
+    def label(self, path, code):
+        if path in API_PATHS or path in ('/events', '/metrics'):
+            return path
+        for pattern, group in METRICS_PATH_GROUPS:
+            path = pattern.sub(group, path)
+        if path in self.paths:
+            return path
+        if code >= 400 or len(self.paths) >= METRICS_MAX_PATHS:
+            return 'other'
+        self.paths.add(path)
+        return path
+
+    def observe(self, path, method, code, seconds, sent):
+        with self.lock:
+            path = self.label(path, code)
+            self.requests[(path, method, code)] += 1
+            self.bytes[path] += sent
+            self.sums[path] += seconds
+            counts = self.buckets.setdefault(path, [0] * (len(METRICS_BUCKETS) + 1))
+            counts[bisect.bisect_left(METRICS_BUCKETS, seconds)] += 1
+
+    def render(self, server):
+        """Texto do /metrics, com os contadores do servidor e dos caches"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {value}")
+
+        def labels(**values):
+            return '{' + ','.join(f'{k}="{escape_label(v)}"' for k, v in values.items()) + '}'
+
+        with self.lock:
+            requests = sorted(self.requests.items())
+            sent = sorted(self.bytes.items())
+            histograms = sorted((path, list(counts), self.sums[path]) for path, counts in self.buckets.items())
+        metric('dashboard_http_requests_total', 'counter', 'Requests respondidos por path, método e status',
+               [(labels(path=p, method=m, code=c), n) for (p, m, c), n in requests])
+        metric('dashboard_http_response_bytes_total', 'counter', 'Bytes enviados (headers + corpo) por path',
+               [(labels(path=p), n) for p, n in sent])
+        samples = []
+        for path, counts, total in histograms:
+            cumulative = 0
+            for bound, count in zip(METRICS_BUCKETS + ('+Inf',), counts):
+                cumulative += count
+                samples.append((labels(path=path, le=bound), cumulative))
+        lines.append("# HELP dashboard_http_request_duration_seconds Tempo de resposta por path")
+        lines.append("# TYPE dashboard_http_request_duration_seconds histogram")
+        for sample_labels, value in samples:
+            lines.append(f"dashboard_http_request_duration_seconds_bucket{sample_labels} {value}")
+        for path, counts, total in histograms:
+            lines.append(f"dashboard_http_request_duration_seconds_sum{labels(path=path)} {total:.6f}")
+            lines.append(f"dashboard_http_request_duration_seconds_count{labels(path=path)} {sum(counts)}")
+
+        cache = server.gzip_cache
+        lookups = cache.hits + cache.misses
+        metric('dashboard_gzip_cache_hits_total', 'counter', 'Arquivos servidos do cache de gzip', [('', cache.hits)])
+        metric('dashboard_gzip_cache_misses_total', 'counter', 'Arquivos comprimidos na hora', [('', cache.misses)])
+        metric('dashboard_gzip_cache_hit_ratio', 'gauge', 'Hits / consultas do cache de gzip',
+               [('', f"{cache.hits / lookups:.4f}" if lookups else 0)])
+        metric('dashboard_gzip_cache_bytes', 'gauge', 'Bytes guardados no cache de gzip', [('', cache.size)])
+        files = server.file_cache
+        metric('dashboard_file_cache_hits_total', 'counter', 'Arquivos servidos da memória', [('', files.hits)])
+        metric('dashboard_file_cache_misses_total', 'counter', 'Arquivos lidos do disco para o cache', [('', files.misses)])
+        metric('dashboard_file_cache_waits_total', 'counter',
+               'Requests que esperaram a leitura de outro request (single-flight)', [('', files.waits)])
+        metric('dashboard_file_cache_bytes', 'gauge', 'Bytes guardados no cache de arquivos', [('', files.size)])
+        metric('dashboard_sendfile_total', 'counter', 'Arquivos grandes enviados por sendfile', [('', server.sendfiles)])
+        with server.lock:
+            connections = len(server.connections)
+            pending = server.pending
+        metric('dashboard_open_connections', 'gauge', 'Conexões HTTP abertas (fora as SSE)', [('', connections)])
+        metric('dashboard_idle_connections', 'gauge', 'Conexões keep-alive ociosas esperando no seletor (sem worker)',
+               [('', server.idle)])
+        metric('dashboard_pending_connections', 'gauge', 'Conexões esperando um worker livre', [('', pending)])
+        if server.hub is not None:
+            metric('dashboard_sse_clients', 'gauge', 'Clientes conectados no /events', [('', len(server.hub.clients))])
+            metric('dashboard_revision', 'counter', 'Mudanças em shared/ vistas pelo /events', [('', server.hub.revision)])
+        if server.store is not None:
+            metric('dashboard_tasks', 'gauge', 'Tasks carregadas na API', [('', len(server.store.index))])
+            metric('dashboard_store_revision', 'counter', 'Revisão de tasks/agentes do /api/changes',
+                   [('', server.store.revision)])
+            metric('dashboard_change_log_items', 'gauge', 'Tasks/agentes guardados no log do /api/changes',
+                   [('', server.store.log_items)])
+            factories = [factory for factory in server.store.roots if factory is not None]
+            if factories:
+                with server.store.lock:
+                    counts = [(labels(factory=f), len(server.store.index.by_factory.get(f, ()))) for f in factories]
+                    loaded = [(labels(factory=f), int(f in server.store.loaded)) for f in factories]
+                metric('dashboard_factory_tasks', 'gauge', 'Tasks carregadas na API por factory', counts)
+                metric('dashboard_factory_loaded', 'gauge', 'Factory já terminou a carga inicial (1) ou não (0)', loaded)
+        return '\n'.join(lines) + '\n'
+
+class CountingWriter:
+    """Envolve o wfile do handler contando os bytes enviados (para o /metrics)"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.count = 0
+
+    def write(self, data):
+        self.count += len(data)
+        return self.raw.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+class ChangeHub:
+    """Canal SSE (/events) compartilhado por todos os clientes.
+
+    Uma thread por factory observa o shared/status.json e o shared/tasks/ dela
+    (inotify via generate.FileWatcher) e envia um evento compacto para todos
+    os sockets conectados; uma factory lenta não atrasa os eventos das outras.
+    Os sockets SSE não ocupam workers do pool.
+    """
+
+    def __init__(self, roots):
+        """`roots`: {factory: diretório shared/}; factory None = uma factory só"""
+        self.roots = {factory: Path(shared) for factory, shared in roots.items()}
+        self.clients = set()
+        self.lock = threading.Lock()
+        self.revision = 0
+        self.watchers = {}
+        self.running = False
+        self.listeners = []
+
+    def start(self):
+        self.running = True
+        for factory, shared in self.roots.items():
+            self.watchers[factory] = generate.FileWatcher([shared / "tasks", shared])
+            threading.Thread(target=self.run, args=(factory,), name=f"sse-hub-{factory or 'main'}",
+                             daemon=True).start()
+
+    @property
+    def mode(self):
+        return ', '.join(sorted({watcher.mode for watcher in self.watchers.values()}))
+
+    def full(self):
+        with self.lock:
+            return len(self.clients) >= SSE_MAX_CLIENTS
+
+    def add(self, sock):
+        """Registra um cliente; retorna False se o limite de clientes foi atingido"""
+        sock.settimeout(SSE_SEND_TIMEOUT)
+        with self.lock:
+            if len(self.clients) >= SSE_MAX_CLIENTS:
+                return False
+            self.clients.add(sock)
+            revision = self.revision
+        self.send(sock, f"retry: {SSE_RETRY_MS}\nid: {revision}\n\n".encode())
+        return True
+
+    def subscribe(self, listener):
+        """Registra listener(arquivos de task alterados ou None, status mudou?, factory)
+
+        Chamado na thread do hub antes do evento ser enviado, para que caches
+        como o TaskStore já estejam atualizados quando os clientes reagirem.
+        """
+        self.listeners.append(listener)
+
+    def run(self, factory=None):
+        watcher = self.watchers[factory]
+        tasks_dir = self.roots[factory] / "tasks"
+        status_file = self.roots[factory] / "status.json"
+        while self.running:
+            changed = generate.collect_changes(watcher, SSE_HEARTBEAT)
+            if changed is None:
+                # Kernel perdeu eventos: avisa que tudo pode ter mudado
+                files, status_changed = None, True
+                event = {'status': True, 'tasks': None}
+            elif changed:
+                files = sorted(p.name for p in changed
+                               if p.parent == tasks_dir and generate.is_task_file(p.name))
+                status_changed = status_file in changed
+                if not files and not status_changed:
+                    continue
+                names = [name[:-5] for name in files]
+                event = {'status': status_changed, 'tasks': names[:SSE_MAX_TASK_IDS]}
+                if len(names) > SSE_MAX_TASK_IDS:
+                    event['more'] = len(names) - SSE_MAX_TASK_IDS
+            else:
+                # Um heartbeat só, não um por factory
+                if factory == next(iter(self.roots)):
+                    self.broadcast(b": ping\n\n")
+                continue
+            if factory is not None:
+                event['factory'] = factory
+            for listener in self.listeners:
+                try:
+                    listener(files, status_changed, factory)
+                except Exception as e:
+                    print(f"⚠️  Erro ao atualizar após mudança: {e}")
+            with self.lock:
+                self.revision += 1
+                event['rev'] = self.revision
+            data = json.dumps(event, separators=(',', ':'))
+            self.broadcast(f"id: {event['rev']}\nevent: change\ndata: {data}\n\n".encode())
+
+    def broadcast(self, payload):
+        with self.lock:
+            clients = list(self.clients)
+        for sock in clients:
+            self.send(sock, payload)
+
+    def send(self, sock, payload):
+        try:
+            sock.sendall(payload)
+        except OSError:
+            # Cliente desconectou (ou está lento demais): descarta
+            self.drop(sock)
+
+    def drop(self, sock):
+        with self.lock:
+            self.clients.discard(sock)
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+    def close(self):
+        self.running = False
+        with self.lock:
+            clients = list(self.clients)
+        for sock in clients:
+            self.drop(sock)
+        for watcher in self.watchers.values():
+            watcher.close()
+
+class ApiError(Exception):
+    """Erro de parâmetro da API (vira resposta 400)"""
+
+class TaskStore:
+    """Tasks e agentes em memória para a API JSON (/api/tasks, /api/agents e
+    /api/changes).
+
+    Carregado uma vez na partida com o mesmo manifesto incremental do
+    generate.py e atualizado pelo ChangeHub só com os arquivos que mudaram.
+    Com várias factories cada uma tem o seu manifesto e as chaves, tasks e
+    agentes ficam como no generate.merge_factories ("<factory>/<arquivo>").
+    Cada atualização que altera tasks ou agentes ganha uma revisão nova; o log
+    guarda quais chaves mudaram em cada revisão (limitado a
+    CHANGE_LOG_MAX_ITEMS), e `epoch` identifica este processo, já que as
+    revisões recomeçam do zero quando o servidor reinicia.
+    """
+
+    def __init__(self, roots):
+        """`roots`: {factory: diretório shared/}; factory None = uma factory só"""
+        self.roots = {factory: Path(shared) for factory, shared in roots.items()}
+        self.manifests = {factory: {} for factory in self.roots}
+        self.factory_locks = {factory: threading.Lock() for factory in self.roots}
+        self.statuses = {}
+        self.status = {}
+        self.index = generate.TaskIndex(API_SORT_FIELDS)
+        self.lock = threading.Lock()
+        self.loaded = set()
+        self.revision = 0
+        self.epoch = f"{time.time_ns():x}"
+        self.log = deque()
+        self.log_items = 0
+        self.log_start = 0
+
+    def load(self, factory=None):
+        """Carga inicial de uma factory (no modo multi-factory, cada uma na sua thread)"""
+        started = time.monotonic()
+        try:
+            self.refresh(factory=factory)
+        except Exception as e:
+            print(f"⚠️  Factory {factory}: erro na carga inicial: {e}")
+            return
+        if factory is not None:
+            missing = '' if (self.roots[factory] / "tasks").is_dir() else " — ⚠️  shared/tasks não encontrado"
+            print(f"   🏭 {factory}: {len(self.manifests[factory])} task(s) em {time.monotonic() - started:.1f}s{missing}")
+
+    def refresh(self, files=None, status_changed=True, factory=None):
+        """Relê as tasks alteradas (todas, se files for None) e/ou o status.json de uma factory"""
+        shared = self.roots[factory]
+        # Uma leitura de cada factory por vez (carga inicial x ChangeHub); as outras não esperam
+        with self.factory_locks[factory]:
+            changes = generate.scan_tasks(shared / "tasks", self.manifests[factory], files) if files != [] else []
+            status = generate.load_json(shared / "status.json") if status_changed else None
+            if factory is not None:
+                changes = [(f"{factory}/{name}", old and dict(old, factory=factory), new and dict(new, factory=factory))
+                           for name, old, new in changes]
+            self.apply(changes, status, factory)
+
+    def apply(self, changes, status, factory):
+        with self.lock:
+            # Arquivo → id da task, só o que mudou de fato (reescrita igual não conta).
+            # Arquivo inválido chega sem task: se já existia, conta como removida
+            tasks = {name: (new or old).get('id', name[:-5])
+                     for name, old, new in changes if (old or new) and old != new}
+            agents = set()
+            if status is not None:
+                if factory is not None:
+                    self.statuses[factory] = status
+                    status = generate.merge_status(self.statuses)
+                before = self.status.get('agents', {})
+                after = status.get('agents', {})
+                agents = {agent_id for agent_id in before.keys() | after.keys()
+                          if before.get(agent_id) != after.get(agent_id)}
+                self.status = status
+            # Atualização incremental do índice: só as tasks que mudaram
+            self.index.apply(changes)
+            if tasks:
+                # O título da task atual faz parte do agente
+                ids = set(tasks.values())
+                agents.update(agent_id for agent_id, agent in self.status.get('agents', {}).items()
+                              if agent.get('currentTask') in ids)
+            # A primeira carga não vai para o log; a de uma factory que termina depois vai
+            if self.loaded and (tasks or agents):
+                self.record(tasks, agents)
+            self.loaded.add(factory)
+
+    def record(self, tasks, agents):
+        """Nova revisão no log; as mais antigas saem quando o log passa do limite"""
+        self.revision += 1
+        self.log.append((self.revision, tasks, agents))
+        self.log_items += len(tasks) + len(agents)
+        while self.log_items > CHANGE_LOG_MAX_ITEMS:
+            revision, old_tasks, old_agents = self.log.popleft()
+            self.log_items -= len(old_tasks) + len(old_agents)
+            self.log_start = revision
+
+    def changes(self, params):
+        """Tasks e agentes alterados depois da revisão `since`.
+
+        Retorna {'rev', 'epoch', 'tasks', 'removed', 'agents', 'agentsRemoved'}
+        ou {'rev', 'epoch', 'resync': True} quando o log não cobre mais
+        `since` (ou `epoch` é de outro processo): o cliente recarrega tudo.
+        """
+        try:
+            since = int(first(params, 'since', ''))
+        except ValueError:
+            raise ApiError("since deve ser um número (rev de uma resposta anterior)")
+        epoch = first(params, 'epoch')
+        with self.lock:
+            result = {'rev': self.revision, 'epoch': self.epoch}
+            if since < self.log_start or since > self.revision or (epoch and epoch != self.epoch):
+                result['resync'] = True
+                return result
+            tasks = {}
+            agents = set()
+            for revision, entry_tasks, entry_agents in reversed(self.log):
+                if revision <= since:
+                    break
+                for name, task_id in entry_tasks.items():
+                    tasks.setdefault(name, task_id)
+                agents.update(entry_agents)
+            current = self.status.get('agents', {})
+            result['tasks'] = [self.index.tasks[name] for name in sorted(tasks) if name in self.index.tasks]
+            result['removed'] = [tasks[name] for name in sorted(tasks) if name not in self.index.tasks]
+            result['agents'] = [self.agent_entry(agent_id, current[agent_id])
+                                for agent_id in sorted(agents) if agent_id in current]
+            result['agentsRemoved'] = [agent_id for agent_id in sorted(agents) if agent_id not in current]
+        return result
+
+    def query_tasks(self, params):
+        """Filtra, ordena e pagina as tasks conforme a query string"""
+        sort = first(params, 'sort', 'createdAt')
+        if sort not in API_SORT_FIELDS:
+            raise ApiError(f"sort deve ser um de: {', '.join(API_SORT_FIELDS)}")
+        order = first(params, 'order', 'desc')
+        if order not in ('asc', 'desc'):
+            raise ApiError("order deve ser asc ou desc")
+        try:
+            limit = int(first(params, 'limit', API_DEFAULT_LIMIT))
+        except ValueError:
+            raise ApiError("limit deve ser um número")
+        limit = max(1, min(limit, API_MAX_LIMIT))
+        # Valor vazio (?assignee=) = campo vazio ou ausente (ex.: tasks sem assignee)
+        filters = {}
+        for param, field in API_FILTERS.items():
+            if param in params:
+                values = set(','.join(params[param]).split(','))
+                if '' in values:
+                    values.add(None)
+                filters[field] = values
+        cursor = first(params, 'cursor')
+        cursor = decode_cursor(cursor) if cursor else None
+
+        with self.lock:
+            index = self.index
+            # Candidatas: interseção dos índices de cada filtro (união dos valores pedidos)
+            matches = None
+            for field, values in filters.items():
+                by_value = {'status': index.by_status, 'priority': index.by_priority, 'assignedTo': index.by_assignee,
+                            'project': index.by_project, 'factory': index.by_factory}[field]
+                keys = set().union(*(by_value.get(value, ()) for value in values))
+                matches = keys if matches is None else matches & keys
+            total = len(index) if matches is None else len(matches)
+
+            ordered = index.sorted[sort]
+            if order == 'desc':
+                end = bisect.bisect_left(ordered, cursor) if cursor else len(ordered)
+                positions = range(end - 1, -1, -1)
+            else:
+                start = bisect.bisect_right(ordered, cursor) if cursor else 0
+                positions = range(start, len(ordered))
+
+            page = []
+            next_cursor = None
+            for position in positions:
+                item = ordered[position]
+                if matches is not None and item[1] not in matches:
+                    continue
+                if len(page) == limit:
+                    next_cursor = encode_cursor(page[-1])
+                    break
+                page.append(item)
+            tasks = [index.tasks[key] for _, key in page]
+            revision = self.revision
+        return {'tasks': tasks, 'total': total, 'nextCursor': next_cursor, 'rev': revision, 'epoch': self.epoch}
+
+    def agent_entry(self, agent_id, agent):
+        """Agente no formato da API, com o título da task atual (chamar com o lock)"""
+        current = agent.get('currentTask')
+        task = self.index.get(current, agent.get('factory'))
+        entry = {
+            'id': agent_id,
+            'name': generate.agent_name(agent_id),
+            'status': agent.get('status', 'idle'),
+            'currentTask': current,
+            'currentTaskTitle': task.get('title') if task else None,
+        }
+        if agent.get('factory'):
+            entry['factory'] = agent['factory']
+        return entry
+
+    def agents(self):
+        """Agentes do status.json com o título da task atual, contagem de tasks e
+        alertas (e o resumo de cada factory, se houver várias): o monitor.html lê daqui"""
+        with self.lock:
+            status = self.status
+            agents = [self.agent_entry(agent_id, agent) for agent_id, agent in status.get('agents', {}).items()]
+            tasks = {'active': self.index.active_count, 'backlog': self.index.count('backlog'),
+                     'done_today': status.get('tasks', {}).get('done_today', 0)}
+            revision = self.revision
+        result = {'agents': agents, 'tasks': tasks, 'alerts': status.get('alerts', []),
+                  'lastUpdate': status.get('lastUpdate'), 'rev': revision, 'epoch': self.epoch}
+        if 'factories' in status:
+            result['factories'] = status['factories']
+        return result
+
+def first(params, name, default=None):
+    """Primeiro valor do parâmetro (vazio conta como ausente)"""
+    value = params.get(name, [''])[0]
+    return value if value else default
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        value, task_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return (str(value), str(task_id))
+    except (ValueError, TypeError):
+        raise ApiError("cursor inválido")
+
+def make_etag(st):
+    """ETag forte a partir do estado do arquivo (mtime em ns + tamanho)"""
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
 
 class CustomHandler(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory=DIRECTORY, **kwargs)
-    
+    # HTTP/1.1: conexões persistentes (keep-alive) por padrão
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        # Só vale para o resto de uma request que já começou a chegar: a espera
+        # entre requests (keep-alive) é no seletor do servidor, sem worker
+        self.timeout = self.server.keepalive_timeout
+        super().setup()
+        self.wfile = CountingWriter(self.wfile)
+        self.idle = False
+        self.server.track(self.connection)
+
+    def handle(self):
+        """Atende as requests que já chegaram e devolve a conexão ociosa ao servidor.
+
+        Com keep-alive e nada mais no buffer, marca `idle` e retorna: o worker
+        fica livre e o servidor chama handle() de novo quando chegar a próxima.
+        """
+        self.idle = False
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            if not self.buffered():
+                self.idle = not self.server.stopping
+                return
+            self.handle_one_request()
+
+    def buffered(self):
+        """Há mais dados já recebidos (request em pipeline)? Nunca bloqueia"""
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def finish(self):
+        if self.idle:
+            # Conexão ociosa: continua aberta, esperando no seletor do servidor
+            return
+        self.server.untrack(self.connection)
+        super().finish()
+
+    def handle_one_request(self):
+        self.request_started = None
+        self.status_code = None
+        self.cache_control = 'no-cache'
+        sent = self.wfile.count
+        super().handle_one_request()
+        if self.request_started is not None and self.status_code is not None:
+            self.server.metrics.observe(self.path.partition('?')[0], self.command, self.status_code,
+                                        time.perf_counter() - self.request_started, self.wfile.count - sent)
+
+    def parse_request(self):
+        # O relógio começa depois da linha do request: a espera em keep-alive não conta
+        self.request_started = time.perf_counter()
+        return super().parse_request()
+
+    def send_response_only(self, code, message=None):
+        self.status_code = int(code)
+        super().send_response_only(code, message)
+
+    def translate_path(self, path):
+        # /factories/<nome>/... vem da raiz da factory (modo multi-factory)
+        prefix = f"/{FACTORY_MOUNT}/"
+        if path.startswith(prefix):
+            name, _, rest = path[len(prefix):].partition('/')
+            root = self.server.factories.get(name)
+            if root is not None:
+                directory = self.directory
+                self.directory = str(root)
+                try:
+                    return super().translate_path('/' + rest)
+                finally:
+                    self.directory = directory
+        return super().translate_path(path)
+
+    def send_head(self):
+        """Serve arquivos com ETag/Last-Modified, 304 condicional e compressão negociada"""
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            return super().send_head()
+        try:
+            st = os.stat(path)
+        except OSError:
+            return super().send_head()
+        ctype = self.guess_type(path)
+        compressible = is_compressible(ctype)
+        if HASHED_ASSET.search(path):
+            self.cache_control = IMMUTABLE_CACHE
+        encoding, source, source_st = None, path, st
+        if compressible:
+            encoding, source, source_st = self.choose_encoding(path, st)
+        etag = make_etag(source_st)
+        if encoding and source == path:
+            etag = etag[:-1] + '-' + encoding + '"'
+        last_modified = self.date_time_string(st.st_mtime)
+
+        if self.not_modified(etag, st.st_mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            if compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return None
+
+        f = body = None
+        try:
+            if source_st.st_size <= self.server.file_cache.max_file:
+                # Da memória: uma leitura do disco para todos os clientes
+                body = self.server.file_cache.get(source, source_st)
+            else:
+                # Grande demais para o cache: vai do arquivo para o socket (copyfile)
+                f = open(source, 'rb')
+        except OSError:
+            return super().send_head()
+        try:
+            if encoding and source == path:
+                # Sem irmão pré-comprimido: comprime na hora (com cache)
+                body = self.server.gzip_cache.get(path, st, f if f is not None else io.BytesIO(body))
+                if f is not None:
+                    f.close()
+                    f = None
+            length = len(body) if f is None else os.fstat(f.fileno()).st_size
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', ctype)
+            self.send_header('Content-Length', str(length))
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            if compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.end_headers()
+            return MemoryBody(body) if f is None else f
+        except:
+            if f is not None:
+                f.close()
+            raise
+
+    def copyfile(self, source, outputfile):
+        if isinstance(source, MemoryBody):
+            outputfile.write(source.data)
+        elif isinstance(source, io.BufferedReader):
+            # Zero-copy: socket.sendfile usa os.sendfile (e respeita o timeout do socket)
+            self.wfile.count += self.connection.sendfile(source)
+            self.server.sendfiles += 1
+        else:
+            super().copyfile(source, outputfile)
+
+    def choose_encoding(self, path, st):
+        """Escolhe a codificação: irmão .br/.gz atualizado, gzip sob demanda ou nenhuma.
+
+        Retorna (encoding, arquivo a servir, stat do arquivo a servir).
+        """
+        accepted = parse_accept_encoding(self.headers.get('Accept-Encoding', ''))
+        for encoding, suffix in PRECOMPRESSED:
+            if not accepts(accepted, encoding):
+                continue
+            try:
+                sibling_st = os.stat(path + suffix)
+            except OSError:
+                continue
+            # Irmão mais antigo que o original está desatualizado
+            if sibling_st.st_mtime_ns >= st.st_mtime_ns:
+                return encoding, path + suffix, sibling_st
+        if accepts(accepted, 'gzip') and st.st_size >= MIN_COMPRESS_SIZE:
+            return 'gzip', path, st
+        return None, path, st
+
+    def not_modified(self, etag, mtime):
+        """Avalia If-None-Match (prioritário) e If-Modified-Since"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            tags = [t.strip() for t in if_none_match.split(',')]
+            # Comparação fraca, como manda a RFC 9110 para GET/HEAD
+            return '*' in tags or etag in [t[2:] if t.startswith('W/') else t for t in tags]
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since and mtime is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            if since.tzinfo is None:
+                return False
+            return int(mtime) <= since.timestamp()
+        return False
+
     def end_headers(self):
         # Adiciona headers CORS
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
+        # no-cache: o navegador guarda, mas revalida (ETag) antes de cada uso;
+        # estáticos com hash no nome são imutáveis
+        self.send_header('Cache-Control', self.cache_control)
         super().end_headers()
 
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        if path == '/events':
+            self.open_event_stream()
+        elif path in API_PATHS:
+            self.serve_api(path, urllib.parse.parse_qs(query, keep_blank_values=True))
+        elif path == '/metrics':
+            self.send_metrics()
+        else:
+            super().do_GET()
+
+    def do_HEAD(self):
+        # API e métricas: mesma resposta do GET, só os headers (send_json/send_metrics)
+        if self.path.partition('?')[0] in (*API_PATHS, '/metrics'):
+            self.do_GET()
+        else:
+            super().do_HEAD()
+
+    def serve_api(self, path, params):
+        store = self.server.store
+        try:
+            if path == '/api/tasks':
+                data = store.query_tasks(params)
+            elif path == '/api/changes':
+                data = store.changes(params)
+            else:
+                data = store.agents()
+        except ApiError as e:
+            self.send_json({'error': str(e)}, HTTPStatus.BAD_REQUEST)
+            return
+        self.send_json(data)
+
+    def send_json(self, data, code=HTTPStatus.OK):
+        """Envia JSON com ETag (hash do corpo), 304 condicional e gzip quando aceito"""
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if code == HTTPStatus.OK and self.not_modified(etag, None):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        accepted = parse_accept_encoding(self.headers.get('Accept-Encoding', ''))
+        encoding = None
+        if accepts(accepted, 'gzip') and len(body) >= MIN_COMPRESS_SIZE:
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+            encoding = 'gzip'
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('ETag', etag)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_metrics(self):
+        body = self.server.metrics.render(self.server).encode('utf-8')
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def open_event_stream(self):
+        """Responde o handshake SSE e entrega o socket ao ChangeHub"""
+        hub = self.server.hub
+        if hub is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        if hub.full():
+            self.send_error(HTTPStatus.SERVICE_UNAVAILABLE, "Limite de clientes SSE atingido")
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'keep-alive')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+        # Marca antes de entregar: a partir do hub.add a thread do hub pode fechar o socket
+        self.server.detach(self.connection)
+        added = False
+        try:
+            added = hub.add(self.connection)
+        finally:
+            if not added:
+                # O hub não ficou com o socket (limite ou erro): fecha ao fim do handler
+                self.server.attach(self.connection)
+
+    def log_message(self, format, *args):
+        # Sem log por request (com dezenas de monitores ele vira gargalo)
+        pass
+
+class PooledHTTPServer(http.server.HTTPServer):
+    """HTTPServer que atende as requests em um pool de threads limitado.
+
+    Conexões keep-alive ociosas não ocupam worker: entre uma request e outra
+    ficam registradas em um seletor (thread "keepalive"), que entrega ao pool
+    só as que têm dados para ler e fecha as que passam de keepalive_timeout
+    segundos paradas. Assim monitores fazendo poll a cada 10s não travam a
+    fila de quem está chegando.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, address, handler, workers=WORKERS, keepalive_timeout=KEEPALIVE_TIMEOUT):
+        super().__init__(address, handler)
+        self.keepalive_timeout = keepalive_timeout
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http")
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.connections = set()
+        self.stopping = False
+        self.gzip_cache = GzipCache()
+        self.file_cache = FileCache()
+        self.sendfiles = 0
+        self.metrics = Metrics()
+        self.hub = None
+        self.store = None
+        self.factories = {}
+        self.detached = set()
+        # Conexões ociosas: os handlers entram em `parking` e a thread do seletor
+        # os registra (acordada pelo socketpair); `idle` é quantos estão parados
+        self.selector = selectors.DefaultSelector()
+        self.wakeup, self.wakeup_writer = socket.socketpair()
+        self.wakeup.setblocking(False)
+        self.wakeup_writer.setblocking(False)
+        self.selector.register(self.wakeup, selectors.EVENT_READ)
+        self.parking = []
+        self.idle = 0
+        self.idle_thread = threading.Thread(target=self.watch_idle, name="keepalive", daemon=True)
+        self.idle_thread.start()
+
+    def process_request(self, request, client_address):
+        self.submit(request, client_address)
+
+    def submit(self, request, client_address, handler=None):
+        with self.lock:
+            self.pending += 1
+        self.pool.submit(self.process_request_thread, request, client_address, handler)
+
+    def process_request_thread(self, request, client_address, handler=None):
+        """Atende uma conexão nova ou (com `handler`) uma ociosa que voltou a ter dados"""
+        with self.lock:
+            self.pending -= 1
+        try:
+            if handler is None:
+                handler = self.RequestHandlerClass(request, client_address, self)
+            else:
+                try:
+                    handler.handle()
+                finally:
+                    handler.finish()
+        except Exception:
+            handler = None
+            self.handle_error(request, client_address)
+        if handler is not None and handler.idle:
+            self.park(handler)
+        else:
+            self.shutdown_request(request)
+
+    def park(self, handler):
+        """Devolve uma conexão keep-alive ociosa ao seletor (libera o worker)"""
+        with self.lock:
+            if not self.stopping:
+                self.parking.append(handler)
+                handler = None
+        if handler is not None:
+            self.close_idle(handler)
+        else:
+            self.wake()
+
+    def close_idle(self, handler):
+        handler.idle = False
+        handler.finish()
+        self.shutdown_request(handler.request)
+
+    def watch_idle(self):
+        """Thread do seletor: acorda conexões ociosas com dados e expira as paradas"""
+        # Todas esperam o mesmo timeout: a ordem de chegada já é a ordem dos prazos
+        deadlines = OrderedDict()
+        while not self.stopping:
+            for key, _ in self.selector.select(timeout=1):
+                if key.fileobj is self.wakeup:
+                    try:
+                        while self.wakeup.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                # Chegou a próxima request (ou o cliente fechou): volta para o pool
+                self.selector.unregister(key.fileobj)
+                del deadlines[key.data]
+                self.submit(key.data.request, key.data.client_address, key.data)
+            with self.lock:
+                parked, self.parking = self.parking, []
+            now = time.monotonic()
+            for handler in parked:
+                self.selector.register(handler.connection, selectors.EVENT_READ, handler)
+                deadlines[handler] = now + self.keepalive_timeout
+            while deadlines:
+                handler, deadline = next(iter(deadlines.items()))
+                if deadline > now:
+                    break
+                del deadlines[handler]
+                self.selector.unregister(handler.connection)
+                self.close_idle(handler)
+            self.idle = len(deadlines)
+        with self.lock:
+            parked, self.parking = self.parking, []
+        for handler in [*deadlines, *parked]:
+            self.close_idle(handler)
+        self.idle = 0
+
+    def wake(self):
+        try:
+            self.wakeup_writer.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass
+
+    def track(self, connection):
+        with self.lock:
+            self.connections.add(connection)
+
+    def untrack(self, connection):
+        with self.lock:
+            self.connections.discard(connection)
+
+    def detach(self, request):
+        """Marca uma conexão que passou a ser do ChangeHub (não fecha ao fim do handler)"""
+        with self.lock:
+            self.detached.add(request)
+
+    def attach(self, request):
+        """Desfaz o detach: a conexão volta a ser fechada ao fim do handler"""
+        with self.lock:
+            self.detached.discard(request)
+
+    def shutdown_request(self, request):
+        with self.lock:
+            if request in self.detached:
+                self.detached.discard(request)
+                return
+        super().shutdown_request(request)
+
+    def graceful_shutdown(self):
+        """Para de aceitar conexões, termina as respostas em andamento e fecha as ociosas"""
+        self.stopping = True
+        self.shutdown()
+        self.stop_idle()
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                # Só o lado de leitura: quem está respondendo termina de enviar
+                connection.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        if self.hub:
+            self.hub.close()
+        self.pool.shutdown(wait=True)
+
+    def stop_idle(self):
+        """Para a thread do seletor, fechando as conexões ociosas"""
+        self.stopping = True
+        self.wake()
+        self.idle_thread.join()
+
+    def server_close(self):
+        super().server_close()
+        self.stop_idle()
+        self.selector.close()
+        self.wakeup.close()
+        self.wakeup_writer.close()
+
 def get_ip():
     """Obtém o IP local da máquina"""
     try:
@@ -32,23 +1210,88 @@ def get_ip():
     except:
         return "localhost"
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Servidor HTTP do dashboard da Facilita Factory")
+    parser.add_argument('--port', type=int, default=PORT, help=f"porta (padrão: {PORT})")
+    parser.add_argument('--bind', default=BIND, help=f"endereço de bind (padrão: {BIND})")
+    parser.add_argument('--directory', default=DIRECTORY, help=f"diretório servido (padrão: {DIRECTORY})")
+    parser.add_argument('--shared', default=None,
+                        help="diretório shared/ observado pelo /events (padrão: <directory>/shared)")
+    parser.add_argument('--factory', action='append', default=[], metavar='NOME=CAMINHO',
+                        help=f"serve mais uma factory (repetível): API e /events juntam todas e a raiz "
+                             f"de cada uma fica em /{FACTORY_MOUNT}/NOME/ (no lugar do --shared)")
+    parser.add_argument('--factories', type=Path, metavar='ARQUIVO',
+                        help='factories de um arquivo JSON {"nome": "/caminho/da/factory", ...}')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help=f"máximo de conexões atendidas em paralelo (padrão: {WORKERS})")
+    parser.add_argument('--keepalive-timeout', type=float, default=KEEPALIVE_TIMEOUT,
+                        help=f"segundos até fechar conexão ociosa (padrão: {KEEPALIVE_TIMEOUT})")
+    args = parser.parse_args()
+    try:
+        args.roots = generate.parse_factories(args.factory, args.factories)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
 def main():
+    args = parse_args()
+    handler = partial(CustomHandler, directory=os.path.abspath(args.directory))
     # Bind em 0.0.0.0 para aceitar conexões externas
-    with socketserver.TCPServer(("0.0.0.0", PORT), CustomHandler) as httpd:
-        ip = get_ip()
-        print(f"✅ Dashboard rodando!")
-        print(f"")
-        print(f"   🌐 Acesso local:  http://localhost:{PORT}/dashboard/monitor.html")
-        print(f"   🌐 Acesso remoto: http://{ip}:{PORT}/dashboard/monitor.html")
-        print(f"")
-        print(f"📂 Servindo arquivos de: {DIRECTORY}")
-        print(f"")
-        print(f"⚠️  Certifique-se que a porta {PORT} está aberta no firewall")
-        print(f"   Pressione Ctrl+C para parar")
-        try:
-            httpd.serve_forever()
-        except KeyboardInterrupt:
-            print("\n👋 Servidor encerrado")
+    httpd = PooledHTTPServer((args.bind, args.port), handler,
+                             workers=args.workers, keepalive_timeout=args.keepalive_timeout)
+    if args.roots:
+        roots = {name: root / "shared" for name, root in args.roots.items()}
+        httpd.factories = {name: Path(os.path.abspath(root)) for name, root in args.roots.items()}
+    else:
+        roots = {None: Path(args.shared or os.path.join(args.directory, "shared"))}
+    httpd.store = TaskStore(roots)
+    httpd.hub = ChangeHub(roots)
+    httpd.hub.subscribe(httpd.store.refresh)
+
+    # O que o inotify viu mudar sai do cache de arquivos na hora (sem esperar o stat)
+    def invalidate(files, status_changed, factory):
+        httpd.file_cache.invalidate(roots[factory] / "tasks", files)
+        if status_changed:
+            httpd.file_cache.invalidate(roots[factory], ["status.json"])
+    httpd.hub.subscribe(invalidate)
+    if args.roots:
+        # Cada factory carrega na sua thread: o servidor já atende enquanto uma lenta termina
+        for name in roots:
+            threading.Thread(target=httpd.store.load, args=(name,), name=f"load-{name}", daemon=True).start()
+    else:
+        httpd.store.load()
+    httpd.hub.start()
+
+    # SIGTERM (systemd, kill) encerra do mesmo jeito que Ctrl+C
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+
+    ip = get_ip()
+    print(f"✅ Dashboard rodando!")
+    print(f"")
+    print(f"   🌐 Acesso local:  http://localhost:{args.port}/dashboard/monitor.html")
+    print(f"   🌐 Acesso remoto: http://{ip}:{args.port}/dashboard/monitor.html")
+    print(f"")
+    print(f"📂 Servindo arquivos de: {args.directory}")
+    for name, root in args.roots.items():
+        print(f"   🏭 /{FACTORY_MOUNT}/{name}/ → {root}")
+    print(f"   {args.workers} workers, keep-alive de {args.keepalive_timeout:g}s")
+    print(f"   Eventos em tempo real: /events ({httpd.hub.mode})")
+    print(f"")
+    print(f"⚠️  Certifique-se que a porta {args.port} está aberta no firewall")
+    print(f"   Pressione Ctrl+C para parar")
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        print("\n⏳ Encerrando (aguardando requests em andamento)...")
+        httpd.graceful_shutdown()
+    finally:
+        httpd.server_close()
+    print("👋 Servidor encerrado")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,43 @@
+#!/bin/bash
+# Prepara dashboard/snapshots/ como worktree do branch dashboard-snapshots:
+# o armazém de snapshots fica fora do histórico do main (rodar uma vez por máquina;
+# o deploy.sh e o auto-update.sh chamam sozinhos quando falta)
+
+set -e
+cd /home/ubuntu/Lev
+
+BRANCH=dashboard-snapshots
+DIR=dashboard/snapshots
+
+if [ -e "$DIR/.git" ]; then
+    echo "✅ $DIR já é o worktree do branch $BRANCH"
+    exit 0
+fi
+
+# Armazém local de antes (era versionado no main): vai para o branch
+if [ -d "$DIR" ]; then
+    mv "$DIR" "$DIR.old"
+fi
+
+if git fetch origin "$BRANCH" 2>/dev/null; then
+    git worktree add "$DIR" "$BRANCH"
+else
+    # Primeiro uso: branch órfão, sem nada do main
+    git worktree add --detach "$DIR"
+    git -C "$DIR" checkout --orphan "$BRANCH"
+    git -C "$DIR" rm -rfq .
+fi
+
+if [ -d "$DIR.old" ]; then
+    cp -rn "$DIR.old/." "$DIR/"
+    rm -rf "$DIR.old"
+fi
+
+# O workflow vai junto: é o push neste branch que dispara o deploy do GitHub Pages
+mkdir -p "$DIR/.github/workflows"
+cp .github/workflows/deploy-pages.yml "$DIR/.github/workflows/"
+git -C "$DIR" add -A
+git -C "$DIR" diff --cached --quiet || git -C "$DIR" commit -q -m "snapshots: armazém do dashboard"
+git -C "$DIR" push -u origin "$BRANCH"
+
+echo "✅ Armazém de snapshots em $DIR (branch $BRANCH)"
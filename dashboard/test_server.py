@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Testes do server.py (só biblioteca padrão): python3 -m unittest discover dashboard
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import server
+
+def write_task(tasks_dir, number, **fields):
+    task = {'id': f"task-{number:03d}", 'title': f"Task {number}", 'status': 'backlog',
+            'createdAt': f"2026-01-01T00:{number % 60:02d}:00", **fields}
+    (tasks_dir / f"task-{number:03d}.json").write_text(json.dumps(task))
+
+class TaskStoreInvalidFileTest(unittest.TestCase):
+    """Um arquivo de task inválido não pode derrubar a carga nem as atualizações"""
+
+    def setUp(self):
+        self.shared = Path(tempfile.mkdtemp(prefix="taskstore-"))
+        self.tasks_dir = self.shared / "tasks"
+        self.tasks_dir.mkdir()
+        (self.shared / "status.json").write_text(json.dumps({'agents': {}}))
+        for number in range(50):
+            write_task(self.tasks_dir, number)
+        self.store = server.TaskStore({None: self.shared})
+
+    def tearDown(self):
+        shutil.rmtree(self.shared, ignore_errors=True)
+
+    def total(self):
+        return self.store.query_tasks({})['total']
+
+    def test_invalid_file_at_startup(self):
+        (self.tasks_dir / "task-zzz-broken.json").write_text('{"id": "quebrada", ')
+        self.store.load()
+        self.assertEqual(self.total(), 50)
+        self.assertIn(None, self.store.loaded)
+
+        # Mudanças depois da carga continuam chegando (e o total não se perde)
+        write_task(self.tasks_dir, 7, status='done')
+        self.store.refresh(["task-007.json"], status_changed=False)
+        self.assertEqual(self.total(), 50)
+        self.assertEqual(self.store.revision, 1)
+        changes = self.store.changes({'since': ['0']})
+        self.assertEqual([task['id'] for task in changes['tasks']], ['task-007'])
+
+    def test_invalid_file_at_runtime(self):
+        self.store.load()
+        (self.tasks_dir / "task-zzz-broken.json").write_text('{"id": ')
+        self.store.refresh(["task-zzz-broken.json"], status_changed=False)
+        self.assertEqual(self.total(), 50)
+        self.assertEqual(self.store.revision, 0)
+
+        # Uma task válida que passa a ser inválida sai do índice, como removida
+        (self.tasks_dir / "task-003.json").write_text('{"id": ')
+        self.store.refresh(["task-003.json"], status_changed=False)
+        self.assertEqual(self.total(), 49)
+        changes = self.store.changes({'since': ['0']})
+        self.assertEqual(changes['removed'], ['task-003'])
+
+        # Corrigida, volta
+        write_task(self.tasks_dir, 3)
+        self.store.refresh(["task-003.json"], status_changed=False)
+        self.assertEqual(self.total(), 50)
+
+if __name__ == '__main__':
+    unittest.main()